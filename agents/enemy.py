@@ -1,9 +1,16 @@
-import pygame
 import random
+from typing import TYPE_CHECKING
+from neighbours import FOUR
+from world import ENEMY
+
+if TYPE_CHECKING:
+    import pygame
 
 
 class Enemy:
-    def __init__(self, x, y, radius, color, speed, max_health, current_tile):
+    kind = ENEMY
+
+    def __init__(self, x, y, radius, color, speed, max_health, current_tile, rng=random):
         self.x = x
         self.y = y
         self.radius = radius
@@ -13,54 +20,38 @@ class Enemy:
         self.max_health = max_health
         self.weapon = None
         self.damage = 2
+        self.rng = rng
         self.current_tile = current_tile
-        current_tile.objects.append(self)
+        current_tile.append(self)
 
     def move(self, WINDOW_WIDTH, WINDOW_HEIGHT, TILE_SIZE, tiles):
-        possible_movesets = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        random_move = random.choice(possible_movesets)
-        new_x = self.x // TILE_SIZE + random_move[0]
-        new_y = self.y // TILE_SIZE + random_move[1]
-
-        if 0 < new_x < WINDOW_WIDTH // TILE_SIZE and 0 < new_y < WINDOW_HEIGHT // TILE_SIZE:
-            self.current_tile.objects.remove(self)
-            new_tile = tiles[new_x][new_y]
-            self.x = new_tile.x
-            self.y = new_tile.y
-            new_tile.objects.append(self)
-            self.current_tile = new_tile
-        else:
-            self.move(WINDOW_WIDTH, WINDOW_HEIGHT, TILE_SIZE, tiles)
-
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
-
-        # Calculate the width and height of the health bar
-        bar_width = self.radius * 2
-        bar_height = 5
-
-        # Calculate the position of the health bar
-        bar_x = self.x - self.radius
-        bar_y = self.y - self.radius - 10
-
-        # Calculate the percentage of health remaining
-        percent_remaining = self.health / self.max_health
-
-        # Calculate the color of the health bar
-        if percent_remaining > 0.5:
-            bar_color = (0, 255, 0)
-        elif percent_remaining > 0.25:
-            bar_color = (255, 255, 0)
-        else:
-            bar_color = (255, 0, 0)
-
-        # Draw the health bar
-        pygame.draw.rect(screen, (128, 128, 128), (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(screen, bar_color, (bar_x, bar_y, bar_width * percent_remaining, bar_height))
+        """
+        Move one tile in a random direction, picked from the directions that stay on the map
+        :param WINDOW_WIDTH: Width of the map in pixels
+        :param WINDOW_HEIGHT: Height of the map in pixels
+        :param TILE_SIZE: Size of a tile in pixels
+        :param tiles: The entire Grid
+        :return: None
+        """
+        x, y = self.x // TILE_SIZE, self.y // TILE_SIZE
+        possible_movesets = [(dx, dy) for dx, dy in FOUR
+                             if 0 <= x + dx < WINDOW_WIDTH // TILE_SIZE and 0 <= y + dy < WINDOW_HEIGHT // TILE_SIZE]
+        if not possible_movesets:
+            return
+        dx, dy = self.rng.choice(possible_movesets)
+        new_tile = tiles[x + dx][y + dy]
+        self.x = new_tile.x
+        self.y = new_tile.y
+        tiles.move(self, x + dx, y + dy)
+        self.current_tile = new_tile
+
+    def draw(self, screen: 'pygame.surface.Surface') -> None:
+        from drawing import draw_enemy
+        draw_enemy(self, screen)
 
     def use_weapon(self):
         if self.weapon is not None:
             base_damage = self.damage + self.weapon.damage
         else:
             base_damage = self.damage
-        return random.randint(base_damage - 2, base_damage + 2)
\ No newline at end of file
+        return self.rng.randint(base_damage - 2, base_damage + 2)
\ No newline at end of file
@@ -1,11 +1,21 @@
-import pygame
 import random
+from typing import TYPE_CHECKING
+import numpy as np
 from food import Food
-from agents.enemy import Enemy
+from enemy_heatmap import EnemyHeatmap
+from memory import Memory
+from visited_map import VisitedMap
+from world import PLAYER, ENEMY, FOOD
+
+if TYPE_CHECKING:
+    import pygame
 
 
 class Player:
-    def __init__(self, x, y, radius, color, speed, max_hunger, max_health):
+    kind = PLAYER
+
+    def __init__(self, x, y, radius, color, speed, max_hunger, max_health, memory_horizon=None, memory_decay=1.0,
+                 rng=random):
         self.x = x
         self.y = y
         self.radius = radius
@@ -14,17 +24,18 @@ class Player:
         self.hunger = max_hunger
         self.max_hunger = max_hunger
         self.damage = 2
+        self.rng = rng
         self.weapon = None
         self.max_health = max_health
         self.health = max_health
         self.not_food = {}
-        self.map_has_visited = [[]]
-        self.memory = {}
+        self.map_has_visited = VisitedMap()
+        self.memory = Memory(horizon=memory_horizon, decay=memory_decay)
         self.direction = None
         self.amount_of_steps = 0
 
         self.hotspot = None
-        self.map_enemy_grid_probabilities = []
+        self.enemy_heatmap = None  # EnemyHeatmap of the remembered enemies, made by reset_map once the grid is known
 
     def index(self) -> (int, int):
         """
@@ -33,33 +44,13 @@ class Player:
         """
         return self.x // self.speed, self.y // self.speed
 
-    def add_grids(self, x, y) -> [(int, int)]:
-        """
-
-        :param x:
-        :param y:
-        :return:
-        """
-        min, max = 0, 19
-
-        lst = []
-        if min < x < max:
-            lst += [(x + 1, y), (x - 1, y)]
-        elif x == min:
-            lst += [(x + 1, y)]
-        elif x == max:
-            lst += [(x - 1, y)]
-
-        return lst
-
     def get_adjacent_tiles(self, tiles) -> []:
         """
         Get the Agent's adjecent tiles
         :param tiles: The entire Grid
-        :return: a list with all adjecent tiles
+        :return: a tuple with all adjecent tiles
         """
-        x, y = self.index()  # Current position
-        return [tiles[x][y] for x, y in self.add_grids(x, y) + [coords[::-1] for coords in self.add_grids(y, x)]]
+        return tiles.neighbours(*self.index())
 
     def move(self, dx, dy, tiles):
         """
@@ -69,8 +60,7 @@ class Player:
         :param tiles: The entire Grid
         :return: None
         """
-        x, y = self.index()
-        self.map_has_visited[x][y] = 1
+        self.map_has_visited.add(self.index())
 
         new_x = self.x + dx * self.speed  # Next x-coordinate
         new_y = self.y + dy * self.speed  # Next y-coordinate
@@ -129,11 +119,9 @@ class Player:
         """
         food_dict = {}
         for tile in self.get_adjacent_tiles(tiles):
-            for object in tile.objects:
-                if isinstance(object, Food):
-                    food_dict[tile] = food_dict.get(tile, 0) + 1
-                    # print("Found food!")
-        # print(food_dict)
+            amount = tile.count(FOOD)
+            if amount:
+                food_dict[tile] = amount
         return food_dict
 
     def max_food_probability(self, tiles, update_probability):
@@ -153,7 +141,7 @@ class Player:
             for tile in self.get_adjacent_tiles(tiles):
                 for timestep in self.memory:
                     tile_memory, objects = self.memory[timestep]
-                    if tile == tile_memory and Food not in [type(object) for object in tile.objects]:
+                    if tile == tile_memory and tile.count(FOOD) == 0:
                         self.not_food[tile] = self.not_food.get(tile, 0) + 1
 
         for tile in food_tiles:
@@ -165,7 +153,7 @@ class Player:
 
         self.notFoundFood = []
 
-        if self.index() == maximum.index() and Food not in [type(object) for object in maximum.objects]:
+        if self.index() == maximum.index() and maximum.count(FOOD) == 0:
             return None
         else:
             return maximum
@@ -176,15 +164,13 @@ class Player:
         :param tiles: The entire Grid
         :return: None
         """
-        new_map = []
-        for tile in tiles:  # For every tile in the grid
-            new = []
-            for num_tile in range(len(tiles)):
-                new.append(0)
-            new_map.append(new)
-        self.map_has_visited = new_map
-        self.map_food_probability = new_map
-        self.map_enemy_grid_probabilities = new_map
+        self.map_has_visited = VisitedMap()
+        if self.enemy_heatmap in self.memory.listeners:
+            self.memory.listeners.remove(self.enemy_heatmap)
+        self.enemy_heatmap = EnemyHeatmap(width=len(tiles), height=len(tiles[0]), decay=self.memory.decay)
+        for timestep, (tile, objects) in self.memory.items():  # The heatmap follows the memory from here on
+            self.enemy_heatmap.remember(tile, objects, timestep)
+        self.memory.listeners.append(self.enemy_heatmap)
 
     def update_memory(self, timestep, tiles):
         """
@@ -193,6 +179,8 @@ class Player:
         :param tiles: The entire Grid
         :return: None
         """
+        if self.enemy_heatmap is not None:  # The sightings also fade on ticks without a memory
+            self.enemy_heatmap.advance(timestep)
         x, y = self.index()
         tuple = (tiles[x][y], tiles[x][y].objects)
         if tuple[1]:
@@ -212,89 +200,41 @@ class Player:
         latest_direction = None
         directions = self.enemy_avoidance_based_on_memory(directions, tiles, amount_tiles)
         x, y = self.index()
-        for i in range(x - 1, max(x - amount_tiles - 1, -1), -1):  # Check west direction
-            # if not tiles[i][y].objects:
-            if self.map_has_visited[i][y] == 0:
-                directions["west"] += 1
-        for i in range(x + 1, min(x + amount_tiles + 1, len(tiles))):  # Check east direction
-            if self.map_has_visited[i][y] == 0:
-                directions["east"] += 1
-        for j in range(y - 1, max(y - amount_tiles - 1, -1), -1):  # Check north direction
-            if self.map_has_visited[x][j] == 0:
-                directions["north"] += 1
-        for j in range(y + 1, min(y + amount_tiles + 1, len(tiles[0]))):  # Check south direction
-            if self.map_has_visited[x][j] == 0:
-                directions["south"] += 1
+        visited = self.map_has_visited
+        west, east = max(x - amount_tiles, 0), min(x + amount_tiles + 1, len(tiles))
+        north, south = max(y - amount_tiles, 0), min(y + amount_tiles + 1, len(tiles[0]))
+        directions["west"] += x - west - visited.count_row(y, west, x)
+        directions["east"] += east - x - 1 - visited.count_row(y, x + 1, east)
+        directions["north"] += y - north - visited.count_column(x, north, y)
+        directions["south"] += south - y - 1 - visited.count_column(x, y + 1, south)
 
         return max(directions, key=directions.get)
 
     def enemy_avoidance_based_on_memory(self, directions, tiles, amount_tiles):
         """
-        Look at all directions and determine how many times it saw an enemy in that direction.
+        Look at all directions and lower their score by how many enemies it remembers seeing in that direction.
         :param directions: All directions the Agent can move to
         :param tiles: The entire Grid
         :param amount_tiles: Amount of tiles it looks ahead
         :return: Dictionary with all directions and its score
         """
-        x, y = self.index()
-        rememberance_of_enemies = self.search_enemy_in_memory()
-        enemy_positions = []
-        for enemy in rememberance_of_enemies:
-            indexed_x = enemy.x // (self.radius * 2)
-            indexed_y = enemy.y // (self.radius * 2)
-            enemy_positions.append((indexed_x, indexed_y))
-
-        for i in range(x - 1, max(x - amount_tiles - 1, -1), -1):  # Check west direction
-            if (i, y) in enemy_positions:
-                directions["west"] -= 1
-
-        for i in range(x + 1, min(x + amount_tiles + 1, len(tiles))):  # Check east direction
-            if (i, y) in enemy_positions:
-                directions["east"] -= 1
-
-        for j in range(y - 1, max(y - amount_tiles - 1, -1), -1):  # Check north direction
-            if (x, j) in enemy_positions:
-                directions["north"] -= 1
-
-        for j in range(y + 1, min(y + amount_tiles + 1, len(tiles[0]))):  # Check south direction
-            if (x, j) in enemy_positions:
-                directions["south"] -= 1
+        if self.enemy_heatmap is None:
+            return directions
+        offsets = {"north": (0, -1), "east": (1, 0), "south": (0, 1), "west": (-1, 0)}
+        heat = self.enemy_heatmap.along(*self.index(), offsets=list(offsets.values()), length=amount_tiles)
+        for direction, amount in zip(offsets, heat):
+            directions[direction] -= amount
         return directions
 
     def calculate_enemy_prob_of_entire_grid_based_on_memory(self, tiles):
         """
         Calculate the probability of encountering an enemy based on how many encounters it has had in its memory
         :param tiles: The entire Grid
-        :return: None
+        :return: Array with the probability per tile, indexed as [x, y]
         """
-        enemy_positions = []
-        rememberance_of_enemies = self.search_enemy_in_memory()
-
-        for enemy in rememberance_of_enemies:
-            indexed_x = enemy.x // (self.radius * 2)
-            indexed_y = enemy.y // (self.radius * 2)
-            enemy_positions.append((indexed_x, indexed_y))
-
-        for i in range(len(self.map_enemy_grid_probabilities)):
-            for j in range(len(self.map_enemy_grid_probabilities[i])):
-                if (i, j) in enemy_positions:
-                    print("enemy detected in grid position: ", i, j, "")
-                    self.map_enemy_grid_probabilities[i][j] += 1
-                else:
-                    self.map_enemy_grid_probabilities[i][j] = 0
-        pass
-
-    def search_enemy_in_memory(self):
-        """
-        Look for enemies that have been encountered in its memory
-        :return: List of all enemies that have been enountered
-        """
-        list_of_enemies = []
-        for key, value in self.memory.items():
-            for obj in value[1]:
-                if isinstance(obj, Enemy):
-                    list_of_enemies.append(obj)
-        return list_of_enemies
+        if self.enemy_heatmap is None:
+            return np.zeros((len(tiles), len(tiles[0])))
+        return self.enemy_heatmap.probabilities()
 
     def enemy_detected(self, tiles):
         """
@@ -306,68 +246,22 @@ class Player:
         get_tiles_data = self.get_adjacent_tiles(tiles)  # Get adjecent tiles
 
         for tile in get_tiles_data:
-            if len(tile.objects) > 0:  # If there is an object in the tile
-                for obj in tile.objects:  # For each object in the tile
-                    if isinstance(obj, Enemy):  # if the object is an enemy
-                        indexed_x = tile.x // (self.radius * 2)  # x-coordinate of enemy
-                        indexed_y = tile.y // (self.radius * 2)  # y-coordinate of enemy
-                        if indexed_x < x:
-                            return "east"
-                        elif indexed_x > x:
-                            return "west"
-                        elif indexed_y < y:
-                            return "south"
-                        elif indexed_y > y:
-                            return "north"
+            if tile.count(ENEMY) > 0:  # if there is an enemy in the tile
+                indexed_x = tile.x // (self.radius * 2)  # x-coordinate of enemy
+                indexed_y = tile.y // (self.radius * 2)  # y-coordinate of enemy
+                if indexed_x < x:
+                    return "east"
+                elif indexed_x > x:
+                    return "west"
+                elif indexed_y < y:
+                    return "south"
+                elif indexed_y > y:
+                    return "north"
         return None
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
-        # Calculate the width and height of the hunger bar
-        bar_width = self.radius * 2
-        bar_height = 10
-
-        # Calculate the position of the hunger bar
-        bar_x = self.x - self.radius
-        bar_y = self.y + self.radius + 5
-
-        # Calculate the percentage of hunger remaining
-        percent_remaining = self.hunger / self.max_hunger
-
-        # Calculate the color of the hunger bar
-        if percent_remaining > 0.5:
-            bar_color = (0, 255, 0)
-        elif percent_remaining > 0.25:
-            bar_color = (255, 255, 0)
-        else:
-            bar_color = (255, 0, 0)
-
-        # Draw the hunger bar
-        pygame.draw.rect(screen, (128, 128, 128), (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(screen, bar_color, (bar_x, bar_y, bar_width * percent_remaining, bar_height))
-
-        # Calculate the width and height of the health bar
-        bar_width = self.radius * 2
-        bar_height = 5
-
-        # Calculate the position of the health bar
-        bar_x = self.x - self.radius
-        bar_y = self.y - self.radius - 10
-
-        # Calculate the percentage of health remaining
-        percent_remaining = self.health / self.max_health
-
-        # Calculate the color of the health bar
-        if percent_remaining > 0.5:
-            bar_color = (0, 255, 0)
-        elif percent_remaining > 0.25:
-            bar_color = (255, 255, 0)
-        else:
-            bar_color = (255, 0, 0)
-
-        # Draw the health bar
-        pygame.draw.rect(screen, (128, 128, 128), (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(screen, bar_color, (bar_x, bar_y, bar_width * percent_remaining, bar_height))
+    def draw(self, screen: 'pygame.surface.Surface') -> None:
+        from drawing import draw_player
+        draw_player(self, screen)
 
     def update_hunger(self, amount: int):
         """
@@ -402,7 +296,7 @@ class Player:
             base_damage = self.damage + self.weapon.damage
         else:
             base_damage = self.damage
-        return random.randint(base_damage - 2, base_damage + 2)
+        return self.rng.randint(base_damage - 2, base_damage + 2)
 
     def remember_attack(self, enemy, timestamp):
         # self.memory[timestamp] += enemy
@@ -0,0 +1,81 @@
+import numpy as np
+from neighbours import FOUR
+from world import World, ENEMY
+from event_log import MOVE
+
+# Moves of an enemy, in the order Enemy.move picks from them: east, west, south, north
+MOVE_X = np.array([dx for dx, dy in FOUR], dtype=np.int32)
+MOVE_Y = np.array([dy for dx, dy in FOUR], dtype=np.int32)
+
+
+class Swarm:
+    """
+    A group of enemies stored as a structure of arrays instead of Enemy objects.
+    Every tick all enemies take one random step at once with array operations, like Enemy.move does for one enemy.
+    An enemy only picks from the moves that stay on the map, so no move is ever tried twice. The enemies are counted
+    in the enemy layer of the world, but are not entities in it: moving one is two additions to that layer.
+    Because they are not in tile.objects, tile.count(ENEMY) sees them but the memories of the agents and the
+    EnemyHeatmap that is built from them don't.
+    """
+
+    def __init__(self, world: World, xs, ys, max_health: int, rng=None) -> None:
+        """
+        :param world: The world the enemies walk in
+        :param xs: x index of every enemy
+        :param ys: y index of every enemy
+        :param max_health: Health every enemy starts with
+        :param rng: NumPy random Generator for the moves, None for an unseeded one
+        """
+        self.world = world
+        self.size = len(xs)
+        self.max_health = max_health
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.x = np.array(xs, dtype=np.int32)  # Tile index of every enemy
+        self.y = np.array(ys, dtype=np.int32)
+        self.health = np.full(self.size, max_health, dtype=np.int32)
+        self.damage = np.full(self.size, 2, dtype=np.int32)
+
+        # The enemies get a block of entity ids, so they can be told apart from the entities in the world
+        self.ids = np.arange(world.next_id, world.next_id + self.size, dtype=np.int32)
+        world.next_id += self.size
+
+        world.counts.add_at(ENEMY, self.x, self.y, 1)
+
+    def move(self) -> None:
+        """
+        Move every enemy one tile in a random direction, picked from the directions that stay on the map
+        :return: None
+        """
+        if not self.size:
+            return
+        world = self.world
+        moves = self.rng.integers(len(MOVE_X), size=self.size, dtype=np.int8)
+
+        # Only enemies on the edge have moves that leave the map, they pick the n-th move that stays on it with n
+        # uniform over the amount of those moves
+        edge = np.flatnonzero((self.x == 0) | (self.x == world.width - 1) | (self.y == 0) | (self.y == world.height - 1))
+        edge_x = self.x[edge, None] + MOVE_X
+        edge_y = self.y[edge, None] + MOVE_Y
+        inside = (edge_x >= 0) & (edge_x < world.width) & (edge_y >= 0) & (edge_y < world.height)
+        options = inside.sum(axis=1)
+        picks = (self.rng.random(len(edge)) * options).astype(np.int8)
+        moves[edge] = (np.cumsum(inside, axis=1) > picks[:, None]).argmax(axis=1)
+
+        enemies = np.arange(self.size) if not (options == 0).any() else np.delete(np.arange(self.size), edge[options == 0])
+        moves = moves[enemies]  # Only on a map of one tile an enemy can't move
+        new_x, new_y = self.x[enemies] + MOVE_X[moves], self.y[enemies] + MOVE_Y[moves]
+
+        world.counts.add_at(ENEMY, self.x[enemies], self.y[enemies], -1)
+        world.counts.add_at(ENEMY, new_x, new_y, 1)
+        self.x[enemies] = new_x
+        self.y[enemies] = new_y
+        if world.recorder is not None:
+            world.recorder.extend(MOVE, ENEMY, self.ids[enemies], new_x, new_y)
+
+    def memory_footprint(self) -> int:
+        """
+        Amount of bytes the arrays of the swarm use
+        :return: int
+        """
+        return sum(array.nbytes for array in (self.x, self.y, self.health, self.damage, self.ids))
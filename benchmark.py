@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+import pygame
+from drawing import SpriteCache
+from engine import Simulation
+from food import Food
+from object_spawner import ObjectSpawner
+from player import Player
+from world import World
+from agents.swarm import Swarm
+from config import TILE_SIZE
+
+GRID_SIZES = (20, 50, 100)
+POPULATION_SIZES = (10, 100, 1000)
+MEMORY_SIZES = (10, 100, 1000)
+LOOK_AHEADS = (3, 10, 30)
+SWARM_SIZES = (1000, 10000, 100000)
+HEADLESS_MODULES = ('engine', 'sweep', 'checkpoint')  # What a process pool worker imports, without pygame
+
+
+def measure(function, setup=None, repeat=5, minimum_time=0.05) -> dict:
+    """
+    Time a function, every repeat calls it until minimum_time has passed
+    :param function: Function without arguments to time
+    :param setup: Function without arguments that is called before every call of function, its time doesn't count
+    :param repeat: Amount of repeats, the statistics are taken over the repeats
+    :param minimum_time: Seconds every repeat runs at least
+    :return: Dictionary with the amount of calls and the min, median and max time per call in microseconds
+    """
+    times = []
+    calls = 0
+    for _ in range(repeat):
+        elapsed, number = 0.0, 0
+        while elapsed < minimum_time:
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            function()
+            elapsed += time.perf_counter() - start
+            number += 1
+        times.append(elapsed / number * 1e6)
+        calls += number
+    return {'calls': calls, 'min_us': min(times), 'median_us': statistics.median(times), 'max_us': max(times)}
+
+
+def create_grid(size: int) -> World:
+    return World(width=size, height=size, tile_size=TILE_SIZE)
+
+
+def create_player(tiles: World, x: int, y: int) -> Player:
+    tile = tiles[x][y]
+    player = Player(x=tile.x, y=tile.y, radius=TILE_SIZE // 2, color=(0, 0, 255), speed=TILE_SIZE, max_hunger=40,
+                    max_health=20)
+    player.reset_map(tiles)
+    tile.append(player)
+    return player
+
+
+def benchmark_choose_spawn_cell(size: int, rng: random.Random) -> dict:
+    spawner = ObjectSpawner(x=size, y=size, rng=rng)
+    spawner.set_specific_chance_in_grid(x=size // 2, y=size // 2, chance=200)
+    return measure(spawner.choose_spawn_cell)
+
+
+def benchmark_calculate_food_probabilities(size: int, memory: int, rng: random.Random) -> dict:
+    tiles = create_grid(size)
+    player = create_player(tiles, size // 2, size // 2)
+    for timestep in range(1, memory + 1):
+        tile = tiles[rng.randrange(size)][rng.randrange(size)]
+        player.memory[timestep] = (tile, [Food])
+    return measure(lambda: player.calculate_food_probabilities(tiles=tiles, update_probability=False))
+
+
+def benchmark_choose_direction(size: int, look_ahead: int, rng: random.Random) -> dict:
+    tiles = create_grid(size)
+    player = create_player(tiles, size // 2, size // 2)
+    for x in range(max(0, size // 2 - look_ahead), min(size, size // 2 + look_ahead + 1)):
+        for y in range(max(0, size // 2 - look_ahead), min(size, size // 2 + look_ahead + 1)):
+            if rng.random() < 0.5:
+                player.map_has_visited.add((x, y))
+    return measure(lambda: player.choose_direction(tiles=tiles, amount_tiles=look_ahead))
+
+
+def benchmark_get_adjacent_tiles(size: int) -> dict:
+    tiles = create_grid(size)
+    player = create_player(tiles, size // 2, size // 2)
+    return measure(lambda: player.get_adjacent_tiles(tiles=tiles))
+
+
+def benchmark_resolve_collisions(size: int, population: int, rng: random.Random) -> dict:
+    tiles = create_grid(size)
+    players = [create_player(tiles, rng.randrange(size), rng.randrange(size)) for _ in range(population)]
+    simulation = Simulation(tiles=tiles, players=players, spawner=ObjectSpawner(x=size, y=size, rng=rng))
+    cells = [player.index() for player in rng.sample(players, k=max(1, population // 10))]
+
+    def place_food() -> None:
+        """A tenth of the players gets food on its tile, so every call picks something up"""
+        for x, y in cells:
+            tile = tiles[x][y]
+            tile.append(Food(x=tile.x, y=tile.y, size=TILE_SIZE // 2, color=(0, 255, 0), visible=True))
+
+    return measure(simulation.resolve_collisions, setup=place_food)
+
+
+def benchmark_swarm_move(size: int, enemies: int, rng: random.Random) -> dict:
+    tiles = create_grid(size)
+    generator = np.random.default_rng(rng.getrandbits(64))
+    swarm = Swarm(world=tiles, xs=generator.integers(size, size=enemies), ys=generator.integers(size, size=enemies),
+                  max_health=10, rng=generator)
+    return measure(swarm.move)
+
+
+def benchmark_tile_draw(size: int, screen: pygame.Surface) -> dict:
+    tiles = create_grid(size)
+    grid = [tiles[x][y] for x in range(size) for y in range(size)]
+
+    def draw() -> None:
+        for tile in grid:
+            tile.draw(screen)
+
+    return measure(draw)
+
+
+def benchmark_import(module: str) -> dict:
+    """
+    Time a new interpreter importing a module, like a process pool worker that starts, minus the interpreter itself
+    :param module: Name of the module
+    :return: Timings like measure, plus if the import loaded pygame
+    """
+    def start(code: str):
+        return lambda: subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(__file__) or None)
+
+    interpreter = measure(start('pass'), repeat=5, minimum_time=1e-9)['min_us']
+    timings = measure(start(f'import {module}'), repeat=5, minimum_time=1e-9)
+    for name in ('min_us', 'median_us', 'max_us'):
+        timings[name] = max(timings[name] - interpreter, 0.0)
+    loaded = subprocess.run([sys.executable, '-c', f"import sys, {module}; sys.exit('pygame' in sys.modules)"],
+                            cwd=os.path.dirname(__file__) or None).returncode
+    return {**timings, 'pygame': bool(loaded)}
+
+
+def benchmark_player_draw(size: int, population: int, screen: pygame.Surface, rng: random.Random,
+                          sprites=False) -> dict:
+    """
+    Draw every player once, with its own draw method or as a cached sprite in one Surface.blits call
+    """
+    tiles = create_grid(size)
+    players = [create_player(tiles, rng.randrange(size), rng.randrange(size)) for _ in range(population)]
+    for player in players:
+        player.hunger, player.health = rng.randint(0, player.max_hunger), rng.randint(0, player.max_health)
+    cache = SpriteCache()
+
+    def draw() -> None:
+        if not sprites:
+            for player in players:
+                player.draw(screen)
+            return
+        blits = []
+        for player in players:
+            surface, rect = cache.get(player)
+            blits.append((surface, (player.x + rect.x, player.y + rect.y)))
+        screen.blits(blits, doreturn=False)
+
+    return measure(draw)
+
+
+def run_benchmarks(grid_sizes=GRID_SIZES, population_sizes=POPULATION_SIZES, memory_sizes=MEMORY_SIZES,
+                   look_aheads=LOOK_AHEADS, swarm_sizes=SWARM_SIZES, seed=0) -> [dict]:
+    """
+    Time the hot paths of the simulation over several grid, population and memory sizes
+    :param grid_sizes: Widths of the square grids
+    :param population_sizes: Amounts of players
+    :param memory_sizes: Amounts of remembered food sightings
+    :param look_aheads: Amounts of tiles the players look ahead when they choose a direction
+    :param swarm_sizes: Amounts of enemies in a swarm
+    :param seed: Seed for the random number generator that builds the scenarios
+    :return: List of results, every result has the name of the benchmark, its parameters and the timings
+    """
+    rng = random.Random(seed)
+    screen = pygame.Surface((max(grid_sizes) * TILE_SIZE, max(grid_sizes) * TILE_SIZE))
+    results = []
+
+    def add(name: str, parameters: dict, timings: dict) -> None:
+        results.append({'name': name, 'parameters': parameters, **timings})
+        print(name, parameters, f"{timings['median_us']:.2f} us", sep='\t')
+
+    for module in HEADLESS_MODULES:
+        add('import', {'module': module}, benchmark_import(module))
+    for size in grid_sizes:
+        add('choose_spawn_cell', {'grid': size}, benchmark_choose_spawn_cell(size, rng))
+        for look_ahead in look_aheads:
+            add('choose_direction', {'grid': size, 'look_ahead': look_ahead},
+                benchmark_choose_direction(size, look_ahead, rng))
+        add('get_adjacent_tiles', {'grid': size}, benchmark_get_adjacent_tiles(size))
+        add('tile_draw', {'grid': size}, benchmark_tile_draw(size, screen))
+        for memory in memory_sizes:
+            add('calculate_food_probabilities', {'grid': size, 'memory': memory},
+                benchmark_calculate_food_probabilities(size, memory, rng))
+        for population in population_sizes:
+            add('resolve_collisions', {'grid': size, 'players': population},
+                benchmark_resolve_collisions(size, population, rng))
+            add('player_draw', {'grid': size, 'players': population},
+                benchmark_player_draw(size, population, screen, rng))
+            add('player_sprites', {'grid': size, 'players': population},
+                benchmark_player_draw(size, population, screen, rng, sprites=True))
+        for enemies in swarm_sizes:
+            add('swarm_move', {'grid': size, 'enemies': enemies}, benchmark_swarm_move(size, enemies, rng))
+    return results
+
+
+def environment() -> dict:
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pygame': pygame.version.ver,
+            'machine': platform.machine(), 'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(baseline: [dict], results: [dict], tolerance=0.25) -> [(dict, float)]:
+    """
+    Find the benchmarks that got slower than a baseline
+    :param baseline: Results of an earlier run
+    :param results: Results of this run
+    :param tolerance: How much slower a benchmark may be before it counts, 0.25 is 25% slower
+    :return: List of tuples of the result and how many times slower it is than the baseline
+    """
+    before = {(result['name'], json.dumps(result['parameters'], sort_keys=True)): result for result in baseline}
+    slower = []
+    for result in results:
+        old = before.get((result['name'], json.dumps(result['parameters'], sort_keys=True)))
+        if old is not None and result['median_us'] > old['median_us'] * (1 + tolerance):
+            slower.append((result, result['median_us'] / old['median_us']))
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the hot paths of the simulation')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file to write the results to')
+    parser.add_argument('--baseline', help='JSON file of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown compared to the baseline')
+    arguments = parser.parse_args()
+
+    results = run_benchmarks()
+    with open(arguments.output, 'w') as file:
+        json.dump({'environment': environment(), 'results': results}, file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)['results']
+        slower = compare(baseline, results, tolerance=arguments.tolerance)
+        for result, factor in slower:
+            print(f"Slower: {result['name']} {result['parameters']} {factor:.2f}x")
+        sys.exit(1 if slower else 0)
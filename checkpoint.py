@@ -0,0 +1,386 @@
+import heapq
+import json
+import os
+import numpy as np
+from chunks import VisitedMaps
+from distance_field import DistanceField
+from engine import Simulation
+from food import Food
+from knowledge import Knowledge, Log, SIGHTING, NOT_FOUND
+from object_spawner import ObjectSpawner
+from player import Player
+from population import Population, DIRECTIONS
+from streams import RandomStreams
+from weapon import Weapon
+from world import World, PLAYER, ENEMY, FOOD, WEAPON
+from agents.enemy import Enemy
+from agents.swarm import Swarm
+
+VERSION = 3
+CLASSES = {PLAYER: Player, ENEMY: Enemy, FOOD: Food, WEAPON: Weapon}  # Kind -> class, memories store classes
+
+
+def save_checkpoint(simulation: Simulation, path: str) -> None:
+    """
+    Write the whole state of a simulation to a directory, so it can be continued or forked later.
+    Everything is stored as NumPy arrays with entity ids and tile indexes instead of object references, plus a small
+    meta.json with the settings, the counters and the states of the random number generators.
+    :param simulation: The simulation
+    :param path: Directory to write to, it's created if needed
+    :return: None
+    """
+    os.makedirs(path, exist_ok=True)
+    arrays = {}
+    world = simulation.tiles
+    if world.registry[ENEMY]:
+        raise ValueError('Enemy objects in the world are not supported, use a Swarm')
+
+    # The grid layers as they are, the chunks that were never allocated stay that way
+    for name, grid in (('counts', world.counts), ('ids', world.ids)):
+        arrays[f'{name}_directory'] = grid.directory
+        arrays[f'{name}_pool'] = grid.pool[:grid.chunks]
+
+    # Items in the order they were placed, players are stored with their own columns
+    items = [entity for entity in world.entities.values() if entity.kind in (FOOD, WEAPON)]
+    arrays['item_id'] = np.array([item.entity_id for item in items], dtype=np.int32)
+    arrays['item_kind'] = np.array([item.kind for item in items], dtype=np.int8)
+    arrays['item_attributes'] = np.array([object_attributes(item) for item in items], dtype=np.int32).reshape(-1, 8)
+    arrays['entity_order'] = np.array(list(world.entities), dtype=np.int32)
+
+    # The entities per tile, in the order they came onto the tile
+    cells = [(x, y, entity_id) for (x, y), entity_ids in world.cells.items() for entity_id in entity_ids]
+    arrays['cells'] = np.array(cells, dtype=np.int32).reshape(-1, 3)
+    painted = [(x, y, *tile.color) for (x, y), tile in world.tiles.items() if tuple(tile.color) != tuple(world.color)]
+    arrays['painted'] = np.array(painted, dtype=np.int32).reshape(-1, 5)
+
+    arrays['spawner_grid'] = simulation.spawner.grid
+    arrays['starved_at'] = simulation.starved_at
+    arrays.update(player_arrays(simulation.players))
+
+    population = simulation.population
+    if population is not None:
+        for name in ('x', 'y', 'hunger', 'health', 'weapon', 'direction', 'amount_of_steps', 'random_moves',
+                     'food_moves', 'food_keys', 'food_seen', 'food_visited', 'ids'):
+            arrays[f'population_{name}'] = getattr(population, name)
+        visited = population.map_has_visited
+        arrays['population_visited_keys'] = visited.keys
+        arrays['population_visited_slots'] = visited.slots
+        arrays['population_visited_bitmaps'] = visited.bitmaps[:visited.used]
+
+    swarm = simulation.swarm
+    if swarm is not None:
+        for name in ('x', 'y', 'health', 'damage', 'ids'):
+            arrays[f'swarm_{name}'] = getattr(swarm, name)
+
+    field = simulation.distance_field
+    meta = {
+        'version': VERSION, 'timestep': simulation.timestep, 'food_eaten': simulation.food_eaten,
+        'weapon_pickups': simulation.weapon_pickups, 'facts_shared': simulation.facts_shared,
+        'share_knowledge': simulation.share_knowledge,
+        'world': {'width': world.width, 'height': world.height, 'tile_size': world.tile_size,
+                  'color': list(world.color), 'next_id': world.next_id, 'chunks': [world.counts.chunks, world.ids.chunks]},
+        'streams': {'seed': simulation.streams.seed, 'states': simulation.streams.getstate()},
+        'distance_field': None if field is None else {'hotspots': list((field.sources - field.foods).elements())},
+        'population': None if population is None else {
+            'max_hunger': population.max_hunger, 'max_health': population.max_health,
+            'look_ahead': population.look_ahead},
+        'swarm': None if swarm is None else {'max_health': swarm.max_health,
+                                             'rng': swarm.rng.bit_generator.state},
+    }
+
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.asarray(array))
+    with open(os.path.join(path, 'meta.json.tmp'), 'w') as file:
+        json.dump(meta, file)
+    os.replace(os.path.join(path, 'meta.json.tmp'), os.path.join(path, 'meta.json'))  # Written last, marks it complete
+
+
+def object_attributes(item) -> tuple:
+    """
+    Attributes of a food or weapon
+    :param item: Food or Weapon
+    :return: Tuple (x, y, size, red, green, blue, visible, damage), damage is -1 for food
+    """
+    return (item.x, item.y, item.size, *item.color, int(item.visible), getattr(item, 'damage', -1))
+
+
+def player_arrays(players: [Player]) -> dict:
+    """
+    Store the players as columns, with a row per player, and their memories as flat tables with the player index
+    :param players: The players
+    :return: Dictionary of name -> array
+    """
+    rows, weapons, memories, kinds, probabilities, visited, has_visited = [], [], [], [], [], [], []
+    learned, learned_kinds, known, logs, facts, fact_kinds = [], [], [], {}, [], []
+    for index, player in enumerate(players):
+        probability = player.food_probabilities
+        rows.append((player.entity_id, player.x, player.y, player.radius, *player.color, player.speed, player.hunger,
+                     player.max_hunger, player.max_health, player.health, player.damage,
+                     DIRECTIONS.index(player.direction) if player.direction is not None else -1,
+                     player.amount_of_steps, player.look_ahead,
+                     player.memory.horizon if player.memory.horizon is not None else -1,
+                     player.decisions["Random Move"], player.decisions["Go To Highest Food Probability"],
+                     probability.base, probability.now, probability.counter, int(player.knowledge is not None),
+                     player.memory.now))
+        if player.weapon is not None:
+            weapons.append((index, player.weapon.entity_id, *object_attributes(player.weapon)))
+
+        for timestep, (tile, types) in player.memory.items():
+            kinds.extend(kind.kind for kind in types)
+            memories.append((index, timestep, *tile.index(), len(kinds)))
+        for timestep, shared in player.memory.learned.items():
+            for tile, types in shared:
+                learned_kinds.extend(kind.kind for kind in types)
+                learned.append((index, timestep, *tile.index(), len(learned_kinds)))
+
+        keys = {item[3]: item[0] for item in probability.heap if probability.entries.get(item[3]) == item[2]}
+        for tile in probability.remembered.keys() | probability.not_found.keys() | probability.found.keys():
+            probabilities.append((index, *tile.index(), probability.found.get(tile, 0),
+                                  probability.remembered.get(tile, 0), probability.order.get(tile, -1),
+                                  probability.entries.get(tile, -1), probability.found_weight.get(tile, 0.0),
+                                  probability.not_found.get(tile, -1.0), keys.get(tile, 0.0)))
+        visited.extend((index, x, y) for x, y in player.map_has_visited)
+        has_visited.extend((index, *tile.index()) for tile in player.has_visited)
+
+        if player.knowledge is not None:
+            for origin, length in player.knowledge.known.items():
+                known.append((index, origin, length))
+                logs[origin] = player.knowledge.logs[origin]  # The same log for every player that knows of it
+
+    for origin, log in logs.items():  # Every log once, also of players that are gone
+        for fact in log.facts:
+            if fact is None:  # A dropped sighting, it keeps its position
+                facts.append((origin, -1, 0, 0, 0, len(fact_kinds)))
+            elif fact[0] == SIGHTING:
+                fact_kinds.extend(kind.kind for kind in fact[4])
+                facts.append((origin, SIGHTING, fact[1], fact[2], fact[3], len(fact_kinds)))
+            else:
+                facts.append((origin, fact[0], fact[1], fact[2], fact[3] if len(fact) > 3 else 0, len(fact_kinds)))
+
+    probabilities = np.array(probabilities, dtype=np.float64).reshape(-1, 10)
+    return {
+        'players': np.array(rows, dtype=np.int64).reshape(-1, 24),
+        'player_decay': np.array([player.memory.decay for player in players], dtype=np.float64),
+        'player_weapons': np.array(weapons, dtype=np.int32).reshape(-1, 10),
+        'memories': np.array(memories, dtype=np.int64).reshape(-1, 5),
+        'memory_kinds': np.array(kinds, dtype=np.int8),
+        'learned': np.array(learned, dtype=np.int64).reshape(-1, 5),
+        'learned_kinds': np.array(learned_kinds, dtype=np.int8),
+        'probability_counts': probabilities[:, :7].astype(np.int64),
+        'probability_weights': probabilities[:, 7:],
+        'visited': np.array(visited, dtype=np.int32).reshape(-1, 3),
+        'has_visited': np.array(has_visited, dtype=np.int32).reshape(-1, 3),
+        'known': np.array(known, dtype=np.int64).reshape(-1, 3),
+        'log_bases': np.array([(origin, log.base) for origin, log in logs.items()], dtype=np.int64).reshape(-1, 2),
+        'facts': np.array(facts, dtype=np.int64).reshape(-1, 6),
+        'fact_kinds': np.array(fact_kinds, dtype=np.int8),
+    }
+
+
+def load_checkpoint(path: str, seed=None) -> Simulation:
+    """
+    Load a checkpoint as a new simulation, every load is an independent fork of the saved run.
+    The arrays are memory mapped copy-on-write, so loading is fast and many forks of one checkpoint share the pages
+    they don't change.
+    :param path: Directory of the checkpoint
+    :param seed: Seed for new random number generators, None to continue with the saved ones exactly
+    :return: The simulation
+    """
+    with open(os.path.join(path, 'meta.json')) as file:
+        meta = json.load(file)
+    if meta['version'] != VERSION:
+        raise ValueError(f'{path} is a checkpoint of version {meta["version"]}, expected {VERSION}')
+
+    def load(name: str):
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='c')
+
+    streams = RandomStreams(seed=seed if seed is not None else meta['streams']['seed'])
+    if seed is None:
+        streams.setstate({name: (state[0], tuple(state[1]), state[2])
+                          for name, state in meta['streams']['states'].items()})
+
+    settings = meta['world']
+    world = World(width=settings['width'], height=settings['height'], tile_size=settings['tile_size'],
+                  color=tuple(settings['color']))
+    world.next_id = settings['next_id']
+    for (name, grid), chunks in zip((('counts', world.counts), ('ids', world.ids)), settings['chunks']):
+        grid.directory = load(f'{name}_directory')
+        grid.pool = load(f'{name}_pool') if chunks else grid.pool
+        grid.chunks = chunks
+
+    entities = {}
+    for entity_id, kind, attributes in zip(load('item_id').tolist(), load('item_kind').tolist(),
+                                           load('item_attributes').tolist()):
+        x, y, size, red, green, blue, visible, damage = attributes
+        if kind == FOOD:
+            entities[entity_id] = Food(x=x, y=y, size=size, color=(red, green, blue), visible=bool(visible))
+        else:
+            entities[entity_id] = Weapon(x=x, y=y, size=size, color=(red, green, blue), visible=bool(visible),
+                                         damage=damage)
+        entities[entity_id].entity_id = entity_id
+    players = load_players(load, world, streams, settings)
+    entities.update((player.entity_id, player) for player in players)
+
+    for entity_id in load('entity_order').tolist():
+        entity = entities[entity_id]
+        world.entities[entity_id] = entity
+        world.registry[entity.kind][entity_id] = entity
+    for x, y, entity_id in load('cells').tolist():
+        world.positions[entity_id] = (x, y)
+        world.cells.setdefault((x, y), []).append(entity_id)
+    for x, y, red, green, blue in load('painted').tolist():
+        world.tile(x, y).color = (red, green, blue)
+    world.repainted.clear()
+
+    spawner = ObjectSpawner(x=world.width, y=world.height, rng=streams.spawner)
+    spawner.grid = np.array(load('spawner_grid'))
+    spawner.sampler = type(spawner.sampler)(spawner.grid)
+
+    population = None
+    if meta['population'] is not None:
+        settings = meta['population']
+        population = Population.__new__(Population)
+        population.world = world
+        population.max_hunger = settings['max_hunger']
+        population.max_health = settings['max_health']
+        population.look_ahead = settings['look_ahead']
+        for name in ('x', 'y', 'hunger', 'health', 'weapon', 'direction', 'amount_of_steps', 'random_moves',
+                     'food_moves', 'food_keys', 'food_seen', 'food_visited', 'ids'):
+            setattr(population, name, load(f'population_{name}'))
+        population.size = len(population.x)
+        population.cell_count = world.width * world.height
+        population.map_has_visited = VisitedMaps(width=world.width, height=world.height)
+        population.map_has_visited.keys = load('population_visited_keys')
+        population.map_has_visited.slots = load('population_visited_slots')
+        bitmaps = load('population_visited_bitmaps')
+        population.map_has_visited.used = len(bitmaps)
+        if len(bitmaps):
+            population.map_has_visited.bitmaps = bitmaps
+
+    swarm = None
+    if meta['swarm'] is not None:
+        swarm = Swarm.__new__(Swarm)
+        swarm.world = world
+        swarm.max_health = meta['swarm']['max_health']
+        for name in ('x', 'y', 'health', 'damage', 'ids'):
+            setattr(swarm, name, load(f'swarm_{name}'))
+        swarm.size = len(swarm.x)
+        swarm.rng = np.random.default_rng()
+        if seed is None:
+            swarm.rng.bit_generator.state = meta['swarm']['rng']
+        else:
+            swarm.rng = np.random.default_rng(streams.enemies.getrandbits(64))
+
+    field = None
+    if meta['distance_field'] is not None:
+        field = DistanceField(world=world, hotspots=[tuple(cell) for cell in meta['distance_field']['hotspots']])
+        for player in players:
+            player.distance_field = field
+
+    simulation = Simulation(tiles=world, players=players, spawner=spawner, population=population, streams=streams,
+                            timestep=meta['timestep'], distance_field=field, swarm=swarm,
+                            share_knowledge=meta['share_knowledge'])
+    simulation.food_eaten = meta['food_eaten']
+    simulation.weapon_pickups = meta['weapon_pickups']
+    simulation.facts_shared = meta['facts_shared']
+    simulation.starved_at = np.array(load('starved_at'))
+    return simulation
+
+
+def load_players(load, world: World, streams: RandomStreams, settings: dict) -> [Player]:
+    """
+    Create the players of a checkpoint with their memories
+    :param load: Function that loads an array of the checkpoint by name
+    :param world: The world of the checkpoint
+    :param streams: Random number generators of the simulation
+    :param settings: World settings of the checkpoint
+    :return: List of players
+    """
+    players = []
+    for row, decay in zip(load('players').tolist(), load('player_decay').tolist()):
+        (entity_id, x, y, radius, red, green, blue, speed, hunger, max_hunger, max_health, health, damage, direction,
+         amount_of_steps, look_ahead, horizon, random_moves, food_moves, base, now, counter, knowledge, memory_now) = row
+        player = Player(x=x, y=y, radius=radius, color=(red, green, blue), speed=speed, max_hunger=max_hunger,
+                        max_health=max_health, memory_horizon=horizon if horizon >= 0 else None, memory_decay=decay,
+                        rng=streams.combat, look_ahead=look_ahead)
+        player.entity_id = entity_id
+        player.hunger, player.health, player.damage = hunger, health, damage
+        player.direction = DIRECTIONS[direction] if direction >= 0 else None
+        player.amount_of_steps = amount_of_steps
+        player.decisions = {"Random Move": random_moves, "Go To Highest Food Probability": food_moves}
+        player.food_probabilities.base, player.food_probabilities.now = base, now
+        player.food_probabilities.counter = counter
+        player.memory.now = memory_now
+        player.knowledge = Knowledge(owner=entity_id) if knowledge else None
+        players.append(player)
+
+    for index, entity_id, x, y, size, red, green, blue, visible, damage in load('player_weapons').tolist():
+        weapon = Weapon(x=x, y=y, size=size, color=(red, green, blue), visible=bool(visible), damage=damage)
+        weapon.entity_id = entity_id
+        players[index].weapon = weapon
+
+    kinds = load('memory_kinds').tolist()
+    start = 0
+    for index, timestep, x, y, end in load('memories').tolist():
+        memory, tile = players[index].memory, world.tile(x, y)
+        memory.entries[timestep] = (tile, [CLASSES[kind] for kind in kinds[start:end]])
+        memory.tiles[tile] = memory.tiles.get(tile, 0) + 1
+        start = end
+    kinds = load('learned_kinds').tolist()
+    start = 0
+    for index, timestep, x, y, end in load('learned').tolist():
+        memory = players[index].memory
+        if timestep not in memory.learned:
+            memory.learned_ticks.append(timestep)
+            memory.learned[timestep] = []
+        memory.learned[timestep].append((world.tile(x, y), [CLASSES[kind] for kind in kinds[start:end]]))
+        start = end
+
+    for (index, x, y, found, remembered, order, entry), (found_weight, not_found, key) in zip(
+            load('probability_counts').tolist(), load('probability_weights').tolist()):
+        probability, tile = players[index].food_probabilities, world.tile(x, y)
+        if remembered:
+            probability.remembered[tile] = remembered
+        if not_found >= 0:
+            probability.not_found[tile] = not_found
+        if found:
+            probability.found[tile] = found
+            probability.found_weight[tile] = found_weight
+            probability.order[tile] = order
+            probability.entries[tile] = entry
+            probability.heap.append((key, -order, entry, tile))  # Only the up-to-date items, with their own chance
+    for player in players:
+        heapq.heapify(player.food_probabilities.heap)
+        heapq.heapify(player.memory.learned_ticks)
+
+    for index, x, y in load('visited').tolist():
+        players[index].map_has_visited.add((x, y))
+    for index, x, y in load('has_visited').tolist():
+        players[index].has_visited.append(world.tile(x, y))
+
+    kinds = load('fact_kinds').tolist()
+    start = 0
+    logs = {}
+    for origin, base in load('log_bases').tolist():
+        logs[origin] = Log()
+        logs[origin].base = base
+    for origin, kind, x, y, value, end in load('facts').tolist():
+        if kind < 0:
+            fact = None
+        elif kind == SIGHTING:
+            fact = (SIGHTING, x, y, value, [CLASSES[kind] for kind in kinds[start:end]])
+        elif kind == NOT_FOUND:
+            fact = (NOT_FOUND, x, y, value)
+        else:
+            fact = (kind, x, y)
+        start = end
+        logs[origin].append(fact)
+    for index, origin, length in load('known').tolist():
+        knowledge = players[index].knowledge
+        knowledge.logs[origin] = logs[origin]  # Shared again by every player that knows of it
+        knowledge.known[origin] = length
+    for player in players:
+        if player.knowledge is not None:
+            player.knowledge.log = player.knowledge.logs[player.knowledge.owner]
+            player.knowledge.changed = set(player.knowledge.logs)  # Compared in full the first time they share
+    return players
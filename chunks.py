@@ -0,0 +1,234 @@
+import numpy as np
+
+CHUNK_SHIFT = 5
+CHUNK_SIZE = 1 << CHUNK_SHIFT  # Width and height of a chunk in tiles
+CHUNK_MASK = CHUNK_SIZE - 1
+
+
+def chunks_for(length: int) -> int:
+    """
+    Amount of chunks needed to cover a length of tiles
+    :param length: Amount of tiles
+    :return: int
+    """
+    return (length + CHUNK_MASK) >> CHUNK_SHIFT
+
+
+class ChunkedGrid:
+    """
+    Layers of values over a grid of tiles, stored in square chunks that are only allocated when a value in them is
+    written. A chunk that was never written reads as the fill value, so the empty parts of a huge world cost nothing.
+    All chunks live in one pool array and a small directory holds the slot of every chunk in the pool, so looking up
+    many tiles at once is still plain array indexing.
+    """
+
+    def __init__(self, width: int, height: int, layers: int, dtype=np.int32, fill=0) -> None:
+        self.width = width
+        self.height = height
+        self.layers = layers
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+
+        self.directory = np.full((chunks_for(width), chunks_for(height)), -1, dtype=np.int32)  # Slot per chunk, -1 if none
+        self.pool = np.full((1, layers, CHUNK_SIZE, CHUNK_SIZE), fill, dtype=self.dtype)
+        self.chunks = 0  # Amount of allocated chunks, the first slots of the pool
+
+    def allocate(self, cx: int, cy: int) -> int:
+        """
+        Allocate the chunk on a chunk index, the pool doubles in size when it's full
+        :param cx: x index of the chunk
+        :param cy: y index of the chunk
+        :return: Slot of the chunk in the pool
+        """
+        if self.chunks == len(self.pool):
+            pool = np.full((2 * len(self.pool),) + self.pool.shape[1:], self.fill, dtype=self.dtype)
+            pool[:self.chunks] = self.pool[:self.chunks]
+            self.pool = pool
+        slot = self.chunks
+        self.directory[cx, cy] = slot
+        self.chunks += 1
+        return slot
+
+    def __getitem__(self, key: (int, int, int)):
+        """
+        Get the value of one layer on one tile: grid[layer, x, y]
+        :param key: Tuple of the layer, x index and y index
+        :return: The value
+        """
+        layer, x, y = key
+        slot = self.directory[x >> CHUNK_SHIFT, y >> CHUNK_SHIFT]
+        if slot < 0:
+            return self.dtype.type(self.fill)
+        return self.pool[slot, layer, x & CHUNK_MASK, y & CHUNK_MASK]
+
+    def __setitem__(self, key: (int, int, int), value) -> None:
+        layer, x, y = key
+        slot = self.directory[x >> CHUNK_SHIFT, y >> CHUNK_SHIFT]
+        if slot < 0:
+            slot = self.allocate(x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        self.pool[slot, layer, x & CHUNK_MASK, y & CHUNK_MASK] = value
+
+    def cell(self, x: int, y: int):
+        """
+        Get the values of all layers on one tile
+        :param x: x index
+        :param y: y index
+        :return: Array with a value per layer
+        """
+        slot = self.directory[x >> CHUNK_SHIFT, y >> CHUNK_SHIFT]
+        if slot < 0:
+            return np.full(self.layers, self.fill, dtype=self.dtype)
+        return self.pool[slot, :, x & CHUNK_MASK, y & CHUNK_MASK]
+
+    def take(self, layer: int, xs, ys):
+        """
+        Get the values of one layer on many tiles at once
+        :param layer: The layer
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes, the same shape as xs
+        :return: Array of values, the same shape as xs
+        """
+        slots = self.slots(xs, ys)
+        values = self.pool.reshape(-1).take(self.flat_indexes(np.maximum(slots, 0), layer, xs, ys))
+        return np.where(slots >= 0, values, self.fill)
+
+    def slots(self, xs, ys):
+        """
+        Get the slots of the chunks of many tiles
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :return: Array of slots, -1 for chunks that aren't allocated
+        """
+        return self.directory.reshape(-1).take((xs >> CHUNK_SHIFT) * self.directory.shape[1] + (ys >> CHUNK_SHIFT))
+
+    def flat_indexes(self, slots, layer: int, xs, ys):
+        """
+        Get the indexes in the flattened pool of tiles in allocated chunks
+        :param slots: Array of the slots of the chunks of the tiles
+        :param layer: The layer
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :return: Array of indexes
+        """
+        if self.pool.size >= 1 << 31:
+            slots = slots.astype(np.int64)
+        return ((slots * self.layers + layer) << CHUNK_SHIFT | xs & CHUNK_MASK) << CHUNK_SHIFT | ys & CHUNK_MASK
+
+    def add_at(self, layer: int, xs, ys, amount: int) -> None:
+        """
+        Add an amount to one layer on many tiles at once, a tile that occurs more than once gets the amount every time
+        :param layer: The layer
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :param amount: Amount to add per occurrence
+        :return: None
+        """
+        if not len(xs):
+            return
+        slots = self.slots(xs, ys)
+        missing = slots < 0
+        if missing.any():
+            chunks = (xs[missing] >> CHUNK_SHIFT) * self.directory.shape[1] + (ys[missing] >> CHUNK_SHIFT)
+            for chunk in np.unique(chunks):
+                self.allocate(*divmod(int(chunk), self.directory.shape[1]))
+            slots = self.slots(xs, ys)
+
+        flat = self.flat_indexes(slots, layer, xs, ys)
+        pool = self.pool.reshape(-1)
+        end = int(flat.max()) + 1
+        if end <= 8 * len(flat):  # Counting with bincount is a lot faster than np.add.at, if the range is small
+            pool[:end] += (np.bincount(flat, minlength=end) * amount).astype(self.dtype)
+        else:
+            cells, occurrences = np.unique(flat, return_counts=True)
+            pool[cells] += (occurrences * amount).astype(self.dtype)
+
+    def box_sum(self, layer: int, xs: slice, ys: slice):
+        """
+        Sum one layer over a box of tiles, only the allocated chunks in the box are looked at
+        :param layer: The layer
+        :param xs: Slice of the x indexes of the box, start and stop on the grid
+        :param ys: Slice of the y indexes of the box, start and stop on the grid
+        :return: The sum, the fill value doesn't count
+        """
+        total = self.dtype.type(0)
+        for cx in range(xs.start >> CHUNK_SHIFT, (xs.stop + CHUNK_MASK) >> CHUNK_SHIFT):
+            for cy in range(ys.start >> CHUNK_SHIFT, (ys.stop + CHUNK_MASK) >> CHUNK_SHIFT):
+                slot = self.directory[cx, cy]
+                if slot >= 0:
+                    left, top = cx << CHUNK_SHIFT, cy << CHUNK_SHIFT
+                    total += self.pool[slot, layer, max(xs.start - left, 0):min(xs.stop - left, CHUNK_SIZE),
+                                       max(ys.start - top, 0):min(ys.stop - top, CHUNK_SIZE)].sum()
+        return total
+
+    def nbytes(self) -> int:
+        return self.directory.nbytes + self.pool.nbytes
+
+
+class VisitedMaps:
+    """
+    For every agent of a group the tiles it has visited, as a bitmap per chunk the agent has been in.
+    Memory grows with the area the agents explored instead of with the size of the world.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.chunks_high = chunks_for(height)
+        self.chunks_per_agent = chunks_for(width) * self.chunks_high
+
+        self.keys = np.zeros(0, dtype=np.int64)  # Sorted agent * chunks_per_agent + chunk of every bitmap
+        self.slots = np.zeros(0, dtype=np.int64)  # Slot in bitmaps for every key
+        self.bitmaps = np.zeros((1, CHUNK_SIZE), dtype=np.uint32)  # A row of bits per x in the chunk, a bit per y
+        self.used = 0
+
+    def chunk_keys(self, agents, xs, ys):
+        return agents.astype(np.int64) * self.chunks_per_agent + (xs >> CHUNK_SHIFT) * self.chunks_high + (
+                ys >> CHUNK_SHIFT)
+
+    def lookup(self, keys):
+        """
+        Get the slots of the bitmaps of chunk keys
+        :param keys: Array of keys
+        :return: Array of slots, -1 for chunks without a bitmap
+        """
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[positions] == keys, self.slots[positions], -1)
+
+    def mark(self, agents, xs, ys) -> None:
+        """
+        Mark tiles as visited, every agent may occur only once
+        :param agents: Array of agent indexes
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :return: None
+        """
+        keys = self.chunk_keys(agents, xs, ys)
+        slots = self.lookup(keys)
+        missing = slots < 0
+        if missing.any():
+            new = np.unique(keys[missing])
+            while self.used + len(new) > len(self.bitmaps):
+                self.bitmaps = np.concatenate((self.bitmaps, np.zeros_like(self.bitmaps)))
+            positions = np.searchsorted(self.keys, new)
+            self.keys = np.insert(self.keys, positions, new)
+            self.slots = np.insert(self.slots, positions, np.arange(self.used, self.used + len(new)))
+            self.used += len(new)
+            slots = self.lookup(keys)
+        self.bitmaps[slots, xs & CHUNK_MASK] |= np.uint32(1) << (ys & CHUNK_MASK).astype(np.uint32)
+
+    def visited(self, agents, xs, ys):
+        """
+        Check if agents visited tiles
+        :param agents: Array of agent indexes
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :return: Boolean array
+        """
+        slots = self.lookup(self.chunk_keys(agents, xs, ys))
+        rows = self.bitmaps[np.maximum(slots, 0), xs & CHUNK_MASK]
+        return (slots >= 0) & ((rows >> (ys & CHUNK_MASK).astype(np.uint32)) & 1 == 1)
+
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.slots.nbytes + self.bitmaps.nbytes
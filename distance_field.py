@@ -0,0 +1,142 @@
+from collections import Counter
+import numpy as np
+from neighbours import FOUR
+from world import World, FOOD
+
+
+class DistanceField:
+    """
+    Distance from every tile to the nearest food or hotspot, shared by all agents (a "Dijkstra map").
+    An agent reads its next step toward food in O(1) by looking for the neighbour that is one step closer.
+
+    The grid has no walls, so the breadth first search distance from a set of sources is the Manhattan distance to the
+    nearest one, which is computed directly with array operations. Every tile also remembers which source it's
+    nearest to. When food appears only the tiles that got closer to food are changed, when food disappears only the
+    tiles that were nearest to it are computed again.
+    """
+
+    def __init__(self, world: World, hotspots=()) -> None:
+        """
+        :param world: The world to follow the food of
+        :param hotspots: (x, y) of tiles that are always a source, like the hotspots of the spawner
+        """
+        self.world = world
+        self.width = world.width
+        self.height = world.height
+        self.unreachable = world.width + world.height  # Farther than any distance on the grid
+
+        self.distances = np.full((world.width, world.height), self.unreachable, dtype=np.int32)
+        self.owners = np.full((world.width, world.height), -1, dtype=np.int64)  # Flat index of the nearest source
+        self.sources = Counter()  # (x, y) -> amount of reasons the tile is a source
+
+        for x, y in hotspots:
+            self.add_source(x, y)
+        self.foods = Counter()  # (x, y) -> amount of food on the tile
+        self.update()
+
+    def update(self) -> None:
+        """
+        Follow the food in the world, only the tiles around food that appeared or disappeared are changed
+        :return: None
+        """
+        world = self.world
+        foods = Counter(world.positions[entity_id] for entity_id in world.registry[FOOD])
+        for cell, amount in (self.foods - foods).items():
+            for _ in range(amount):
+                self.remove_source(*cell)
+        for cell, amount in (foods - self.foods).items():
+            for _ in range(amount):
+                self.add_source(*cell)
+        self.foods = foods
+
+    def around(self, x: int, y: int, affected):
+        """
+        Find the part of the grid a change of the source on a tile affects.
+        The tiles a source affects lie around it without gaps: the tile one step closer to the source on the way to an
+        affected tile is affected too. So a window that is grown until no affected tile lies on its edge has them all.
+        :param x: x index of the source
+        :param y: y index of the source
+        :param affected: Function that gets the distances to the source and the current distances in a window and
+                         gives a boolean array of the affected tiles
+        :return: Tuple of the slices of the window for x and y, the distances to the source and the affected tiles
+        """
+        radius = 8
+        while True:
+            xs = slice(max(x - radius, 0), min(x + radius + 1, self.width))
+            ys = slice(max(y - radius, 0), min(y + radius + 1, self.height))
+            distances = (np.abs(np.arange(xs.start, xs.stop) - x)[:, None] +
+                         np.abs(np.arange(ys.start, ys.stop) - y)[None, :]).astype(np.int32)
+            inside = affected(distances, self.distances[xs, ys])
+            whole_grid = xs.stop - xs.start == self.width and ys.stop - ys.start == self.height
+            if whole_grid or not (inside & (distances >= radius)).any():
+                return xs, ys, distances, inside
+            radius *= 2
+
+    def add_source(self, x: int, y: int) -> None:
+        """
+        Make a tile a source, the tiles that are closer to it than to any other source get its distance
+        :param x: x index
+        :param y: y index
+        :return: None
+        """
+        self.sources[(x, y)] += 1
+        if self.sources[(x, y)] > 1:
+            return
+
+        xs, ys, distances, closer = self.around(x, y, lambda new, current: new < current)
+        self.distances[xs, ys][closer] = distances[closer]
+        self.owners[xs, ys][closer] = x * self.height + y
+
+    def remove_source(self, x: int, y: int) -> None:
+        """
+        Stop a tile from being a source, the tiles that were nearest to it are computed again from the other sources
+        :param x: x index
+        :param y: y index
+        :return: None
+        """
+        self.sources[(x, y)] -= 1
+        if self.sources[(x, y)] > 0:
+            return
+        del self.sources[(x, y)]
+
+        # Every tile with this source as its nearest has it as one of its nearest, those tiles lie around it
+        xs, ys, distances, nearest = self.around(x, y, lambda new, current: new == current)
+        orphans = np.nonzero(nearest & (self.owners[xs, ys] == x * self.height + y))
+        orphan_x, orphan_y = orphans[0] + xs.start, orphans[1] + ys.start
+        if not self.sources:
+            self.distances[orphan_x, orphan_y] = self.unreachable
+            self.owners[orphan_x, orphan_y] = -1
+            return
+
+        sources = np.array(list(self.sources), dtype=np.int64)
+        distances = np.abs(orphan_x[:, None] - sources[:, 0]) + np.abs(orphan_y[:, None] - sources[:, 1])
+        nearest = distances.argmin(axis=1)
+        self.distances[orphan_x, orphan_y] = distances[np.arange(len(nearest)), nearest]
+        self.owners[orphan_x, orphan_y] = sources[nearest, 0] * self.height + sources[nearest, 1]
+
+    def distance(self, x: int, y: int) -> int:
+        return int(self.distances[x, y])
+
+    def reachable(self, x: int, y: int) -> bool:
+        """
+        Check if there is a source to walk to from a tile
+        :param x: x index
+        :param y: y index
+        :return: boolean
+        """
+        return self.distances[x, y] < self.unreachable
+
+    def next_step(self, x: int, y: int):
+        """
+        Get the step toward the nearest source, along the x-axis first
+        :param x: x index
+        :param y: y index
+        :return: Tuple (dx, dy), None on a source or when there is no source
+        """
+        distance = self.distances[x, y]
+        if distance == 0 or distance >= self.unreachable:
+            return None
+        for dx, dy in FOUR:
+            if 0 <= x + dx < self.width and 0 <= y + dy < self.height and self.distances[x + dx, y + dy] < distance:
+                return dx, dy
+        return None
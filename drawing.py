@@ -0,0 +1,197 @@
+from collections import OrderedDict
+import pygame
+from world import PLAYER, ENEMY, WEAPON
+
+# The view layer: how tiles, agents and items look on a pygame surface.
+# The model only imports this module the first time something is drawn, so a headless simulation never loads pygame.
+
+TRANSPARENT = (255, 0, 255)  # Background color of the sprites, no entity is drawn in this color
+
+
+def draw_bar(screen: pygame.surface.Surface, x: int, y: int, width: int, height: int, fraction: float) -> None:
+    """
+    Draw a hunger or health bar, green above half, yellow above a quarter and red below that
+    :param screen: Pygame surface
+    :param x: Left side of the bar
+    :param y: Top of the bar
+    :param width: Width of a full bar
+    :param height: Height of the bar
+    :param fraction: How full the bar is, between 0 and 1
+    :return: None
+    """
+    if fraction > 0.5:
+        color = (0, 255, 0)
+    elif fraction > 0.25:
+        color = (255, 255, 0)
+    else:
+        color = (255, 0, 0)
+    pygame.draw.rect(screen, (128, 128, 128), (x, y, width, height))
+    pygame.draw.rect(screen, color, (x, y, width * fraction, height))
+
+
+def draw_player(player, screen: pygame.surface.Surface, position=None) -> None:
+    """
+    Draw an agent as a circle with its hunger bar below and its health bar above
+    :param player: Player
+    :param screen: Pygame surface
+    :param position: (x, y) to draw the agent at, None for where it is
+    :return: None
+    """
+    x, y = position if position is not None else (player.x, player.y)
+    pygame.draw.circle(screen, player.color, (x, y), player.radius)
+    draw_bar(screen, x - player.radius, y + player.radius + 5, player.radius * 2, 10, player.hunger / player.max_hunger)
+    draw_bar(screen, x - player.radius, y - player.radius - 10, player.radius * 2, 5, player.health / player.max_health)
+
+
+def draw_enemy(enemy, screen: pygame.surface.Surface, position=None) -> None:
+    """
+    Draw an enemy as a circle with its health bar above
+    :param enemy: Enemy
+    :param screen: Pygame surface
+    :param position: (x, y) to draw the enemy at, None for where it is
+    :return: None
+    """
+    x, y = position if position is not None else (enemy.x, enemy.y)
+    pygame.draw.circle(screen, enemy.color, (x, y), enemy.radius)
+    draw_bar(screen, x - enemy.radius, y - enemy.radius - 10, enemy.radius * 2, 5, enemy.health / enemy.max_health)
+
+
+def draw_object(item, screen: pygame.surface.Surface, position=None) -> None:
+    """
+    Draw an item as a circle, when it's visible
+    :param item: Object, like Food
+    :param screen: Pygame surface
+    :param position: (x, y) to draw the item at, None for where it is
+    :return: None
+    """
+    if item.visible is True:
+        center = position if position is not None else (item.x, item.y)
+        pygame.draw.circle(surface=screen, color=item.color, center=center, radius=item.size)
+
+
+def draw_weapon(weapon, screen: pygame.surface.Surface, position=None) -> None:
+    """
+    Draw a weapon as a handle and a blade
+    :param weapon: Weapon
+    :param screen: Pygame surface
+    :param position: (x, y) to draw the weapon at, None for where it is
+    :return: None
+    """
+    x, y = position if position is not None else (weapon.x, weapon.y)
+
+    # Draw the handle
+    handle_width = weapon.size // 2
+    handle_x = x - handle_width // 2
+    handle_y = y - weapon.size
+    pygame.draw.rect(screen, weapon.color, (handle_x, handle_y, handle_width, handle_width + 10))
+
+    # Draw the blade
+    blade_width = weapon.size // 2
+    blade_x = x - blade_width // 2
+    blade_y = y - weapon.size
+    pygame.draw.rect(screen, weapon.color, (blade_x, blade_y, blade_width + 10, blade_width))
+
+
+def draw_tile(tile, screen: pygame.surface.Surface) -> None:
+    """
+    Draw a tile with a black border
+    :param tile: Tile
+    :param screen: Pygame surface
+    :return: None
+    """
+    rect = pygame.Rect(tile.x, tile.y, tile.size, tile.size)
+    rect.center = (tile.x, tile.y)
+    pygame.draw.rect(surface=screen, color=tile.color, rect=rect)
+    pygame.draw.rect(surface=screen, color=(0, 0, 0), rect=rect, width=1)
+
+
+def bounds(entity) -> pygame.Rect:
+    """
+    Get the area an entity covers when it's drawn, including its hunger and health bars, relative to its position
+    :param entity: Player, Enemy, Food or Weapon
+    :return: pygame.Rect
+    """
+    if entity.kind == PLAYER:  # Circle, health bar above and hunger bar below
+        return pygame.Rect(-entity.radius, -entity.radius - 10, entity.radius * 2 + 1, entity.radius * 2 + 26)
+    elif entity.kind == ENEMY:  # Circle and health bar above
+        return pygame.Rect(-entity.radius, -entity.radius - 10, entity.radius * 2 + 1, entity.radius * 2 + 11)
+    elif entity.kind == WEAPON:  # Handle and blade, both start at the top left
+        return pygame.Rect(-(entity.size // 4), -entity.size, entity.size // 2 + 10, entity.size // 2 + 10)
+    return pygame.Rect(-entity.size, -entity.size, entity.size * 2 + 1, entity.size * 2 + 1)
+
+
+def bar_bucket(fraction: float, width: int) -> (int, int):
+    """
+    Quantize a bar to what it looks like
+    :param fraction: How full the bar is
+    :param width: Width of a full bar
+    :return: Tuple of the width of the filled part in pixels and its color, 0 green, 1 yellow and 2 red
+    """
+    return int(width * fraction), 0 if fraction > 0.5 else (1 if fraction > 0.25 else 2)
+
+
+def sprite_key(entity):
+    """
+    Everything that changes what an entity looks like, apart from where it is
+    :param entity: Player, Enemy, Food or Weapon
+    :return: Tuple, None for an entity that isn't drawn
+    """
+    if entity.kind == PLAYER:
+        return (PLAYER, entity.color, entity.radius, bar_bucket(entity.hunger / entity.max_hunger, entity.radius * 2),
+                bar_bucket(entity.health / entity.max_health, entity.radius * 2))
+    elif entity.kind == ENEMY:
+        return ENEMY, entity.color, entity.radius, bar_bucket(entity.health / entity.max_health, entity.radius * 2)
+    elif entity.kind == WEAPON:
+        return WEAPON, entity.color, entity.size
+    return (entity.kind, entity.color, entity.size) if entity.visible is True else None
+
+
+class SpriteCache:
+    """
+    Entities drawn once onto small transparent surfaces, so drawing an entity is one blit instead of a circle and up to
+    four rectangles. Sprites are kept per kind, color, size and the quantized hunger and health bars, so agents that
+    look the same share a sprite. Only the least recently used sprites are kept when there are more than the capacity.
+    """
+
+    def __init__(self, capacity=1024) -> None:
+        """
+        :param capacity: Amount of sprites that are kept
+        """
+        self.capacity = capacity
+        self.sprites = OrderedDict()  # Key -> (surface, rect relative to the position of the entity), oldest use first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.sprites)
+
+    def get(self, entity):
+        """
+        Get the sprite of an entity, it's drawn the first time it's asked for
+        :param entity: Player, Enemy, Food or Weapon
+        :return: Tuple of the surface and its area relative to the position of the entity, None if there is nothing to
+                 draw
+        """
+        key = sprite_key(entity)
+        if key is None:
+            return None
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        rect = bounds(entity)
+        surface = pygame.Surface(rect.size)
+        surface.fill(TRANSPARENT)
+        DRAW.get(entity.kind, draw_object)(entity, surface, position=(-rect.left, -rect.top))
+        surface.set_colorkey(TRANSPARENT, pygame.RLEACCEL)  # Faster to blit than per pixel alpha
+        sprite = (surface, rect)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+
+DRAW = {PLAYER: draw_player, ENEMY: draw_enemy, WEAPON: draw_weapon}  # Draw function per kind, draw_object otherwise
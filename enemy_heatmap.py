@@ -0,0 +1,148 @@
+import math
+import numpy as np
+from chunks import ChunkedGrid
+from world import ENEMY
+
+
+class EnemyHeatmap:
+    """
+    How often an agent remembers seeing enemies on every tile, kept up to date with every memory that comes in or is
+    forgotten instead of rescanning the memory.
+    The heat lives in a chunked array, so only the parts of the world where enemies were seen take memory, and scoring
+    a direction or looking up a tile costs the same however much the agent remembers. With a decay below 1 older
+    sightings weigh exponentially less. Like in FoodProbabilities the weights are stored relative to a base tick, so
+    time passing never touches the array.
+    """
+
+    def __init__(self, width: int, height: int, decay=1.0) -> None:
+        """
+        :param width: Amount of tiles from left to right
+        :param height: Amount of tiles from top to bottom
+        :param decay: How much a sighting still counts after every tick
+        """
+        if not 0 < decay <= 1:
+            raise ValueError(f'decay has to be above 0 and at most 1, not {decay}')
+        self.width = width
+        self.height = height
+        self.decay = decay
+        self.base = 0  # Tick the weights are relative to
+        self.now = 0  # Latest tick, the heat is how much the sightings still count on this tick
+
+        self.heat = ChunkedGrid(width, height, layers=1, dtype=np.float64)  # Weight of the sightings per tile
+        self.total = 0.0  # Weight of all sightings
+
+    def weight(self, timestep: int) -> float:
+        """
+        Weight of a sighting relative to the base tick
+        :param timestep: Tick of the sighting
+        :return: float
+        """
+        return self.decay ** (self.base - timestep)
+
+    def remember(self, tile, objects: list, timestep: int) -> None:
+        """
+        Count the enemies in a new memory of a tile
+        :param tile: The remembered tile
+        :param objects: Types of the objects on the tile
+        :param timestep: Tick of the memory
+        :return: None
+        """
+        self.advance(timestep)
+        enemies = sum(kind.kind == ENEMY for kind in objects)
+        if enemies:
+            self.add(tile, enemies * self.weight(timestep))
+
+    def forget(self, tile, objects: list, timestep: int) -> None:
+        """
+        Undo the enemies of a memory that is no longer remembered
+        :param tile: The forgotten tile
+        :param objects: Types of the objects on the tile
+        :param timestep: Tick of the memory
+        :return: None
+        """
+        enemies = sum(kind.kind == ENEMY for kind in objects)
+        if enemies:
+            self.add(tile, -enemies * self.weight(timestep))
+
+    def advance(self, timestep: int) -> None:
+        """
+        Let time pass up to a tick, the sightings count less from then on
+        :param timestep: Current tick
+        :return: None
+        """
+        self.now = max(self.now, timestep)
+        if self.decay < 1 and (self.now - self.base) * -math.log(self.decay) > 230:  # Weights would pass e ** 230
+            self.rebase(self.now)
+
+    def add(self, tile, weight: float) -> None:
+        x, y = tile.index()
+        self.heat[0, x, y] = max(self.heat[0, x, y] + weight, 0.0)  # Rounding must not leave negative heat
+        self.total = max(self.total + weight, 0.0)
+
+    def rebase(self, timestep: int) -> None:
+        """
+        Make the weights relative to another tick, the heat of every tile stays the same
+        :param timestep: The new base tick
+        :return: None
+        """
+        factor = self.decay ** (timestep - self.base)
+        self.base = timestep
+        self.heat.pool[:self.heat.chunks] *= factor
+        self.total *= factor
+
+    def sightings(self, x: int, y: int) -> float:
+        """
+        Get the decayed amount of enemies seen on a tile
+        :param x: x index
+        :param y: y index
+        :return: float
+        """
+        return float(self.heat[0, x, y]) * self.decay ** (self.now - self.base)
+
+    def probability(self, x: int, y: int) -> float:
+        """
+        Chance that a remembered enemy sighting was on a tile
+        :param x: x index
+        :param y: y index
+        :return: float between 0 and 1
+        """
+        if not self.total:
+            return 0.0
+        return float(self.heat[0, x, y]) / self.total
+
+    def probabilities(self):
+        """
+        Get the chance of every tile of the grid at once
+        :return: Array with a chance per tile, indexed as [x, y]
+        """
+        xs, ys = np.meshgrid(np.arange(self.width), np.arange(self.height), indexing='ij')
+        heat = self.heat.take(0, xs, ys)
+        return heat / self.total if self.total else heat
+
+    def along(self, x: int, y: int, offsets, length: int) -> list:
+        """
+        Sum the heat of the tiles on straight lines from a tile, the tile itself and tiles past the edge not included
+        :param x: x index
+        :param y: y index
+        :param offsets: Direction (dx, dy) of every line, along one axis
+        :param length: Amount of tiles per line
+        :return: List with the decayed amount of enemies seen per line
+        """
+        if not self.total:
+            return [0.0] * len(offsets)
+        factor = self.decay ** (self.now - self.base)
+        heat = []
+        for dx, dy in offsets:
+            xs = slice(x, x + 1) if not dx else (slice(x + 1, min(x + length + 1, self.width)) if dx > 0 else
+                                                  slice(max(x - length, 0), x))
+            ys = slice(y, y + 1) if not dy else (slice(y + 1, min(y + length + 1, self.height)) if dy > 0 else
+                                                  slice(max(y - length, 0), y))
+            heat.append(float(self.heat.box_sum(0, xs, ys)) * factor)
+        return heat
+
+    def footprint(self) -> int:
+        """
+        Amount of bytes the heatmap uses
+        :return: int
+        """
+        return self.heat.nbytes()
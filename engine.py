@@ -0,0 +1,338 @@
+import random
+import numpy as np
+from player import Player
+from food import Food
+from tile import Tile
+from weapon import Weapon
+from object_spawner import ObjectSpawner
+from world import World, PLAYER, ENEMY, FOOD, WEAPON
+from population import Population
+from agents.swarm import Swarm
+from streams import RandomStreams
+from distance_field import DistanceField
+from knowledge import Knowledge, contact_groups, share, compact, COMPACT_INTERVAL
+from event_log import EventLog, SPAWN
+from telemetry import Telemetry
+from trajectory import TrajectoryWriter
+from profiler import Profiler, BEHAVIOUR, SPAWN as SPAWN_PHASE, COLLISION
+from config import *
+
+
+def get_random_tile(tiles: World, rng=random) -> Tile:
+    """
+    Get a random tile from the grid
+    :param tiles: The entire Grid
+    :param rng: Random number generator
+    :return: A random tile from the Grid
+    """
+    return rng.choice(rng.choice(tiles))
+
+
+class Simulation:
+    """
+    Headless simulation engine, advances the world without any display or event loop.
+    With Player objects a tick costs about 0.1 ms per player, so the default 10 players run about 1,000 ticks per
+    second (about 750 with share_knowledge), not tens of thousands. For many agents the vectorized Population is the
+    fast path, about 650,000 agent ticks per second at 100k agents; batch experiments get their speed from sweep.py,
+    which runs the seeds and configurations in parallel processes.
+    """
+
+    def __init__(self, tiles: World, players: [Player], spawner: ObjectSpawner, population=None, streams=None,
+                 timestep=0, distance_field=None, swarm=None, share_knowledge=False) -> None:
+        self.tiles = tiles
+        self.players = players
+        self.spawner = spawner
+        self.population = population
+        self.swarm = swarm
+        self.share_knowledge = share_knowledge  # Players that can communicate merge their knowledge every tick
+        self.distance_field = distance_field
+        self.streams = streams if streams is not None else RandomStreams()
+        self.timestep = timestep
+        self.profiler = None  # Profiler that times the phases of every tick, None to not time them
+        self.telemetry = None  # Telemetry that records the state of the agents every tick, None to not record it
+        self.trajectory = None  # TrajectoryWriter that stores every tick to view it later, None to not store it
+
+        # Statistics of the run
+        self.food_eaten = 0
+        self.weapon_pickups = 0
+        self.facts_shared = 0
+        self.starved_at = np.full(len(players) + (population.size if population is not None else 0), -1)  # Per agent
+
+    @property
+    def weapons(self) -> [Weapon]:
+        return self.tiles.entities_of(WEAPON)
+
+    @property
+    def foods(self) -> [Food]:
+        return self.tiles.entities_of(FOOD)
+
+    def hunger(self):
+        """
+        Get the hunger of all agents, the players first
+        :return: Array of hunger per agent
+        """
+        hunger = np.array([player.hunger for player in self.players], dtype=np.int32)
+        if self.population is not None:
+            hunger = np.concatenate((hunger, self.population.hunger))
+        return hunger
+
+    def summary(self) -> dict:
+        """
+        Summarize the run so far
+        :return: Dictionary with the amount of ticks, the average amount of ticks the agents survived before their
+                 hunger first ran out, and the amount of eaten foods and picked up weapons
+        """
+        survived = np.where(self.starved_at >= 0, self.starved_at, self.timestep)
+        return {'ticks': self.timestep, 'survival_ticks': float(survived.mean()) if survived.size else 0.0,
+                'food_eaten': self.food_eaten, 'weapon_pickups': self.weapon_pickups}
+
+    def decisions(self) -> dict:
+        """
+        Count the actions all agents chose so far
+        :return: Dictionary with the amount of random moves and moves to food
+        """
+        random_moves = sum(player.decisions["Random Move"] for player in self.players)
+        food_moves = sum(player.decisions["Go To Highest Food Probability"] for player in self.players)
+        if self.population is not None:
+            random_moves += int(self.population.random_moves.sum())
+            food_moves += int(self.population.food_moves.sum())
+        return {'random_move': random_moves, 'go_to_food': food_moves}
+
+    def step(self, moves=None) -> None:
+        """
+        Advance the world with one tick: agent and enemy behaviour, food spawning and collisions
+        :param moves: Dictionary of player -> (dx, dy) to move players by hand this tick, the other agents wait. None to
+                      let every agent choose for itself
+        :return: None
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_tick()
+        self.timestep += 1
+        if self.tiles.recorder is not None:
+            self.tiles.recorder.tick = self.timestep
+        if self.distance_field is not None:
+            self.distance_field.update()  # Repairs the distances around food that appeared or was eaten
+
+        if moves is None:
+            for player in self.players:
+                player.update_behaviour(tiles=self.tiles, timestep=self.timestep)
+            if self.population is not None:
+                self.population.update_behaviour(timestep=self.timestep)
+        else:
+            for player, (dx, dy) in moves.items():
+                player.steer(dx=dx, dy=dy, tiles=self.tiles, timestep=self.timestep)
+        if self.swarm is not None:
+            self.swarm.move()
+        if self.share_knowledge:
+            self.communicate()
+
+        starving = np.flatnonzero((self.hunger() == 0) & (self.starved_at < 0))
+        self.starved_at[starving] = self.timestep
+        if profiler is not None:
+            profiler.lap(BEHAVIOUR)
+
+        self.spawn()
+        if profiler is not None:
+            profiler.lap(SPAWN_PHASE)
+
+        self.resolve_collisions()
+        if profiler is not None:
+            profiler.lap(COLLISION)
+            profiler.end_tick()
+        if self.telemetry is not None:
+            self.telemetry.record(self)
+        if self.trajectory is not None:
+            self.trajectory.record(self)
+
+    def communicate(self) -> None:
+        """
+        Let every group of players that can communicate bring each other up to date with what they know, and now
+        and then drop what none of them can still need from the logs
+        :return: None
+        """
+        for group in contact_groups(self.players, self.tiles):
+            self.facts_shared += share(group, self.tiles)
+        if self.timestep % COMPACT_INTERVAL == 0:
+            compact([player for player in self.players if player.knowledge is not None], self.timestep)
+
+    def spawn(self) -> None:
+        """
+        Let the spawner try to place new food on the grid
+        :return: None
+        """
+        self.spawner.spawn_food(self.tiles)
+
+    def resolve_collisions(self) -> None:
+        """
+        Let players pick up the weapons and foods they are standing on.
+        Only the tiles of the players are looked at, the first player on a tile gets all items on it.
+        :return: None
+        """
+        counts = self.tiles.counts
+        for player in self.players:
+            x, y = player.index()
+            if counts[WEAPON, x, y] or counts[FOOD, x, y]:
+                for item in player.pick_up_items(tiles=self.tiles):
+                    if self.tiles.recorder is not None:
+                        self.tiles.recorder.pickup(player.entity_id, item.entity_id, item.kind, x, y)
+                    if item.kind == FOOD:
+                        self.food_eaten += 1
+                    else:
+                        self.weapon_pickups += 1
+        if self.population is not None:
+            foods, weapons = self.population.pick_up_items()
+            self.food_eaten += foods
+            self.weapon_pickups += weapons
+
+    def record(self, log: EventLog) -> None:
+        """
+        Log everything that happens in the world from now on, starting with where everything is right now
+        :param log: The event log
+        :return: None
+        """
+        world = self.tiles
+        world.recorder = log
+        log.tick = self.timestep
+        for entity_id, entity in world.entities.items():
+            log.spawn(entity_id, entity.kind, *world.positions[entity_id])
+        if self.population is not None:
+            log.extend(SPAWN, PLAYER, self.population.ids, self.population.x, self.population.y)
+        if self.swarm is not None:
+            log.extend(SPAWN, ENEMY, self.swarm.ids, self.swarm.x, self.swarm.y)
+
+    def run(self, steps: int) -> None:
+        """
+        Advance the world a number of ticks in a tight loop
+        :param steps: Amount of ticks
+        :return: None
+        """
+        for _ in range(steps):
+            self.step()
+
+
+def create_world(seed=None, player_count=10, max_hunger=40, hotspots=None, memory_horizon=None,
+                 memory_decay=1.0, vectorized=False, width=TILES_WIDE, height=TILES_HIGH, look_ahead=3,
+                 distance_field=False, enemy_count=0, share_knowledge=False) -> Simulation:
+    """
+    Create the grid, items, spawner and players
+    :param seed: Seed for the random number generator, None for an unseeded run
+    :param player_count: Amount of players
+    :param max_hunger: Maximum hunger of the players
+    :param hotspots: Tuples (x, y, chance) of tiles with a higher chance of spawning food, None for one in the center
+    :param memory_horizon: Amount of ticks the players remember, None to remember everything
+    :param memory_decay: How much a memory still counts after every tick
+    :param vectorized: Create the players as one Population instead of Player objects, it has no memory horizon, decay,
+                       distance field or knowledge sharing
+    :param width: Amount of tiles from left to right
+    :param height: Amount of tiles from top to bottom
+    :param look_ahead: Amount of tiles the players look ahead when they choose a direction
+    :param distance_field: Let hungry players walk to the nearest food or hotspot with a shared DistanceField instead
+                           of to the food they remember
+    :param enemy_count: Amount of enemies, they walk around randomly as one Swarm
+    :param share_knowledge: Let players that can communicate share what they saw and where they have been
+    :return: Simulation with the initialized world
+    """
+    if vectorized:
+        unsupported = [name for name, value in (('memory_horizon', memory_horizon is not None),
+                                                ('memory_decay', memory_decay != 1.0),
+                                                ('distance_field', distance_field),
+                                                ('share_knowledge', share_knowledge)) if value]
+        if unsupported:
+            raise ValueError(f'{", ".join(unsupported)} not supported with vectorized=True')
+
+    if hotspots is None:
+        hotspots = ((width // 2, height // 2, 200),)
+    streams = RandomStreams(seed=seed)
+
+    # Create grid
+    tiles = World(width=width, height=height, tile_size=TILE_SIZE)
+
+    # Initialize weapon on random tile
+    random_tile = get_random_tile(tiles, rng=streams.world)
+    weapon = Weapon(x=random_tile.x, y=random_tile.y, size=TILE_SIZE // 2, color=(255, 215, 100), visible=True, damage=6)
+    random_tile.append(weapon)
+
+    # Initialize food on random tile
+    random_tile = get_random_tile(tiles, rng=streams.world)
+    food = Food(x=random_tile.x, y=random_tile.y, size=TILE_SIZE // 2, color=(0, 255, 0), visible=True)
+    random_tile.append(food)
+
+    # Initialize spawner
+    spawner = ObjectSpawner(x=width, y=height, rng=streams.spawner)
+    for x, y, chance in hotspots:
+        spawner.set_specific_chance_in_grid(x=x, y=y, chance=chance)
+
+    # Initialize the enemies on random tiles
+    swarm = None
+    if enemy_count:
+        rng = np.random.default_rng(streams.enemies.getrandbits(64))
+        swarm = Swarm(world=tiles, xs=rng.integers(width, size=enemy_count), ys=rng.integers(height, size=enemy_count),
+                      max_health=10, rng=rng)
+
+    # Initialize the players on random tiles
+    if vectorized:
+        random_tiles = [get_random_tile(tiles, rng=streams.world).index() for _ in range(player_count)]
+        population = Population(world=tiles, xs=[x for x, y in random_tiles], ys=[y for x, y in random_tiles],
+                                max_hunger=max_hunger, max_health=20, look_ahead=look_ahead)
+        return Simulation(tiles=tiles, players=[], spawner=spawner, population=population, streams=streams, swarm=swarm)
+
+    field = DistanceField(world=tiles, hotspots=[(x, y) for x, y, chance in hotspots]) if distance_field else None
+    players = []
+    for i in range(player_count):
+        random_tile = get_random_tile(tiles, rng=streams.world)
+        players.append(Player(x=random_tile.x, y=random_tile.y, radius=TILE_SIZE // 2, color=(0, 0, 255), speed=TILE_SIZE,
+                              max_hunger=max_hunger, max_health=20, memory_horizon=memory_horizon, memory_decay=memory_decay,
+                              rng=streams.combat, look_ahead=look_ahead, distance_field=field))
+        players[i].reset_map(tiles)
+        x, y = random_tile.index()
+        tiles[x][y].append(players[i])
+        if share_knowledge:
+            players[i].knowledge = Knowledge(owner=players[i].entity_id)
+
+    return Simulation(tiles=tiles, players=players, spawner=spawner, streams=streams, distance_field=field, swarm=swarm,
+                      share_knowledge=share_knowledge)
+
+
+def run(steps: int, seed=None, log_path=None, profile_path=None, telemetry_path=None, trajectory_path=None,
+        **settings) -> Simulation:
+    """
+    Run a headless simulation
+    :param steps: Amount of ticks to simulate
+    :param seed: Seed for the random number generators
+    :param log_path: File to write an event log of the run to, None for no log
+    :param profile_path: JSON file to write the timings of the tick phases to, None to not time them
+    :param telemetry_path: Directory to write the state of the agents of every tick to, None to not record it
+    :param trajectory_path: File to store every tick in for the viewer, the first tick before the run, None to not
+                            store them
+    :param settings: Extra settings for create_world
+    :return: The simulation after the last tick
+    """
+    simulation = create_world(seed=seed, **settings)
+    if profile_path is not None:
+        simulation.profiler = Profiler(simulation=simulation, path=profile_path)
+    log = None
+    if log_path is not None:
+        log = EventLog(log_path)
+        simulation.record(log)
+    if telemetry_path is not None:
+        simulation.telemetry = Telemetry(telemetry_path)
+    if trajectory_path is not None:
+        simulation.trajectory = TrajectoryWriter(trajectory_path, simulation.tiles)
+        simulation.trajectory.record(simulation)
+
+    try:
+        simulation.run(steps)
+    finally:
+        if log is not None:
+            log.close()
+            simulation.tiles.recorder = None
+        if simulation.profiler is not None:
+            simulation.profiler.write()
+        if simulation.telemetry is not None:
+            simulation.telemetry.close()
+            simulation.telemetry = None
+        if simulation.trajectory is not None:
+            simulation.trajectory.close()
+            simulation.trajectory = None
+    return simulation
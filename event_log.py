@@ -0,0 +1,164 @@
+import numpy as np
+
+# Event types
+SPAWN, MOVE, REMOVE, PICKUP, COMBAT = range(5)
+
+# One fixed width record per event, 22 bytes on disk. Tile indexes are 32 bit, worlds can be wider than 32767.
+# For PICKUP other is the id of the item, for COMBAT other is the id of the target and x the damage.
+RECORD = np.dtype([('tick', '<u4'), ('event', 'u1'), ('kind', 'u1'), ('entity', '<i4'), ('x', '<i4'), ('y', '<i4'),
+                   ('other', '<i4')])
+MAGIC = b'HGEVLOG2'
+
+
+class EventLog:
+    """
+    Compact binary log of everything that changes the world: spawns, moves, removals, pickups and combat.
+    Events are collected in a preallocated buffer and written to the file in big blocks.
+    """
+
+    def __init__(self, path: str, buffer_size=1 << 16) -> None:
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.buffer = np.zeros(buffer_size, dtype=RECORD)
+        self.length = 0
+        self.tick = 0
+
+    def append(self, event: int, kind: int, entity: int, x: int, y: int, other=-1) -> None:
+        if self.length == len(self.buffer):
+            self.flush()
+        self.buffer[self.length] = (self.tick, event, kind, entity, x, y, other)
+        self.length += 1
+
+    def extend(self, event: int, kind: int, entities, xs, ys) -> None:
+        """
+        Log the same event for many entities at once
+        :param event: Event type
+        :param kind: Kind of the entities
+        :param entities: Array of entity ids
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :return: None
+        """
+        start = 0
+        while start < len(entities):
+            if self.length == len(self.buffer):
+                self.flush()
+            end = min(len(entities), start + len(self.buffer) - self.length)
+            block = self.buffer[self.length:self.length + end - start]
+            block['tick'] = self.tick
+            block['event'] = event
+            block['kind'] = kind
+            block['entity'] = entities[start:end]
+            block['x'] = xs[start:end]
+            block['y'] = ys[start:end]
+            block['other'] = -1
+            self.length += end - start
+            start = end
+
+    def spawn(self, entity: int, kind: int, x: int, y: int) -> None:
+        self.append(SPAWN, kind, entity, x, y)
+
+    def move(self, entity: int, kind: int, x: int, y: int) -> None:
+        self.append(MOVE, kind, entity, x, y)
+
+    def remove(self, entity: int, kind: int, x: int, y: int) -> None:
+        self.append(REMOVE, kind, entity, x, y)
+
+    def pickup(self, entity: int, item: int, kind: int, x: int, y: int) -> None:
+        self.append(PICKUP, kind, entity, x, y, other=item)
+
+    def combat(self, attacker: int, target: int, kind: int, damage: int) -> None:
+        self.append(COMBAT, kind, attacker, damage, 0, other=target)
+
+    def flush(self) -> None:
+        """
+        Write the buffered events to the file
+        :return: None
+        """
+        self.file.write(self.buffer[:self.length].tobytes())
+        self.file.flush()
+        self.length = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+class Replay:
+    """
+    Reads an event log back without running the simulation.
+    The file is memory mapped and every query works on whole arrays of events, so replaying runs at the speed the
+    records can be read.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not an event log')
+            empty = not file.read(1)
+        if empty:
+            self.events = np.zeros(0, dtype=RECORD)
+        else:
+            self.events = np.memmap(path, dtype=RECORD, mode='r', offset=len(MAGIC))
+        self.last_tick = int(self.events['tick'][-1]) if len(self.events) else 0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def end_of(self, tick: int) -> int:
+        """
+        Index of the first event after a tick
+        :param tick: The tick
+        :return: int
+        """
+        return int(np.searchsorted(self.events['tick'], tick, side='right'))
+
+    def events_of(self, tick: int):
+        """
+        Get the events of one tick
+        :param tick: The tick
+        :return: Array of records
+        """
+        return self.events[self.end_of(tick - 1):self.end_of(tick)]
+
+    def __iter__(self):
+        """
+        Go through the log tick by tick
+        :return: Iterator of (tick, array of records)
+        """
+        ticks = self.events['tick'].astype(np.int64)
+        starts = np.flatnonzero(np.diff(ticks, prepend=-1))
+        ends = np.append(starts[1:], len(ticks))
+        for start, end in zip(starts, ends):
+            yield int(ticks[start]), self.events[start:end]
+
+    def state_at(self, tick: int):
+        """
+        Get where every entity is at the end of a tick
+        :param tick: The tick
+        :return: Array with the last SPAWN or MOVE record of every entity in the world, sorted by entity id
+        """
+        events = self.events[:self.end_of(tick)]
+        placements = events[np.isin(events['event'], (SPAWN, MOVE, REMOVE))]
+
+        # The last placement of every entity tells where it is, unless it was removed
+        reverse = placements[::-1]
+        _, last = np.unique(reverse['entity'], return_index=True)
+        latest = reverse[last]
+        return np.array(latest[latest['event'] != REMOVE])
+
+    def first_difference(self, other: 'Replay'):
+        """
+        Compare two logs, for example of an optimized engine and a reference run
+        :param other: The other log
+        :return: Tick of the first event that differs, None if the logs are the same
+        """
+        length = min(len(self), len(other))
+        different = np.flatnonzero(self.events[:length] != other.events[:length])
+        if different.size:
+            return int(self.events['tick'][different[0]])
+        if len(self) != len(other):
+            longer = self if len(self) > len(other) else other
+            return int(longer.events['tick'][length])
+        return None
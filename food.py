@@ -1,7 +1,11 @@
 from object import Object
+from world import FOOD
 
 
 class Food(Object):
+    kind = FOOD
+    nutrition = 30  # Hunger that is restored by eating the food
+
     def collision_detected(self, collisioned) -> None:
         self.visible = 0
-        collisioned.update_hunger(30)
\ No newline at end of file
+        collisioned.update_hunger(self.nutrition)
\ No newline at end of file
@@ -0,0 +1,162 @@
+import heapq
+import sys
+from food import Food
+
+
+class FoodProbabilities:
+    """
+    Running counts of how often an agent found food on a tile and how often it didn't.
+    A heap keeps the tiles ordered by their chance of food, so the best tile is found in O(log n).
+    With a decay below 1 older observations weigh exponentially less. Weights are stored relative to a base tick, so
+    the chance of a tile only changes when it's observed again and the heap never has to be reordered for time passing.
+    """
+
+    def __init__(self, decay=1.0) -> None:
+        if not 0 < decay <= 1:
+            raise ValueError(f'decay has to be above 0 and at most 1, not {decay}')
+        self.decay = decay
+        self.base = 0  # Tick the weights are relative to
+        self.now = 0  # Latest tick that was remembered
+
+        self.found = {}  # Tile -> amount of memories with food on the tile
+        self.found_weight = {}  # Tile -> weight of the memories with food on the tile
+        self.not_found = {}  # Tile -> weight of the times the tile had no food
+        self.remembered = {}  # Tile -> amount of memories of the tile
+        self.order = {}  # Tile -> when food was first seen on the tile, later sightings win a tie
+        self.heap = []  # (-probability, -order, entry, tile)
+        self.entries = {}  # Tile -> entry number of its up-to-date heap item
+        self.counter = 0
+
+    def probability(self, tile) -> float:
+        """
+        Chance of finding food on a tile
+        :param tile: Tile
+        :return: float between 0 and 1
+        """
+        found = self.found_weight.get(tile, 0)
+        if not found:
+            return 0.0
+        return found / (found + self.not_found.get(tile, 0))
+
+    def weight(self, timestep: int) -> float:
+        """
+        Weight of an observation relative to the base tick
+        :param timestep: Tick of the observation
+        :return: float
+        """
+        return self.decay ** (self.base - timestep)
+
+    def remember(self, tile, objects: list, timestep: int) -> None:
+        """
+        Count a new memory of a tile
+        :param tile: The remembered tile
+        :param objects: Types of the objects on the tile
+        :param timestep: Tick of the memory
+        :return: None
+        """
+        self.now = max(self.now, timestep)
+        if self.weight(self.now) > 1e100:  # Move the base before the weights overflow
+            self.rebase(self.now)
+
+        self.remembered[tile] = self.remembered.get(tile, 0) + 1
+        if Food in objects:
+            if tile not in self.found:
+                self.order[tile] = self.next_number()
+            self.found[tile] = self.found.get(tile, 0) + 1
+            self.found_weight[tile] = self.found_weight.get(tile, 0) + self.weight(timestep)
+            self.push(tile)
+
+    def forget(self, tile, objects: list, timestep: int) -> None:
+        """
+        Undo a memory of a tile that is no longer remembered
+        :param tile: The forgotten tile
+        :param objects: Types of the objects on the tile
+        :param timestep: Tick of the memory
+        :return: None
+        """
+        self.remembered[tile] -= 1
+        if not self.remembered[tile]:
+            del self.remembered[tile]
+        if Food in objects:
+            self.found[tile] -= 1
+            if self.found[tile]:
+                self.found_weight[tile] = max(self.found_weight[tile] - self.weight(timestep), 0.0)
+                self.push(tile)
+            else:  # The tile is not a food tile anymore, its heap item becomes stale
+                del self.found[tile], self.found_weight[tile], self.order[tile], self.entries[tile]
+
+    def add_not_found(self, tile, amount: int) -> None:
+        """
+        Count that a tile had no food
+        :param tile: Tile
+        :param amount: How many times to count it
+        :return: None
+        """
+        if amount:
+            self.not_found[tile] = self.not_found.get(tile, 0) + amount * self.weight(self.now)
+            if tile in self.found:
+                self.push(tile)
+
+    def rebase(self, timestep: int) -> None:
+        """
+        Make the weights relative to another tick, the chances stay the same
+        :param timestep: The new base tick
+        :return: None
+        """
+        factor = self.decay ** (timestep - self.base)
+        self.base = timestep
+        for weights in (self.found_weight, self.not_found):
+            for tile in weights:
+                weights[tile] *= factor
+
+    def best(self, exclude=()):
+        """
+        Get the tile with the highest chance of food
+        :param exclude: Tiles to skip
+        :return: Tile, None if there is no tile left
+        """
+        skipped = []
+        best = None
+        while self.heap:
+            item = self.heap[0]
+            if self.entries.get(item[3]) != item[2]:  # Stale item, the tile got a newer one
+                heapq.heappop(self.heap)
+            elif item[3] in exclude:
+                skipped.append(heapq.heappop(self.heap))
+            else:
+                best = item[3]
+                break
+        for item in skipped:
+            heapq.heappush(self.heap, item)
+        return best
+
+    def sorted(self) -> dict:
+        """
+        Get all food tiles with their chance, the highest chance first
+        :return: Dictionary of tiles and their probability
+        """
+        tiles = sorted(self.found, key=lambda tile: (self.probability(tile), self.order[tile]), reverse=True)
+        return {tile: self.probability(tile) for tile in tiles}
+
+    def push(self, tile) -> None:
+        entry = self.next_number()
+        self.entries[tile] = entry
+        heapq.heappush(self.heap, (-self.probability(tile), -self.order[tile], entry, tile))
+
+        if len(self.heap) > 2 * len(self.entries) + 16:  # Drop the stale items once they are the majority
+            self.heap = [item for item in self.heap if self.entries.get(item[3]) == item[2]]
+            heapq.heapify(self.heap)
+
+    def next_number(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    def footprint(self) -> int:
+        """
+        Estimate the amount of bytes the counters and the heap use
+        :return: int
+        """
+        size = sys.getsizeof(self.heap) + len(self.heap) * sys.getsizeof((0.0, 0, 0, None))
+        for counts in (self.found, self.found_weight, self.not_found, self.remembered, self.order, self.entries):
+            size += sys.getsizeof(counts)
+        return size
@@ -0,0 +1,251 @@
+import sys
+from neighbours import FOUR
+
+# Kinds of facts an agent can share
+SIGHTING, NOT_FOUND, VISITED = range(3)
+
+COMPACT_INTERVAL = 50  # Ticks between two compactions of the logs
+
+
+class Log:
+    """
+    The facts one agent observed, oldest first. Every agent that knows of them refers to this one log, so a fact is
+    stored once however many agents know it.
+    A fact keeps its position in the log for good, so the amount of facts an agent knows of a log always means the
+    same facts. Compacting only changes what nobody can still need: the start every agent has is dropped and counted
+    in base, sightings that are too old to be remembered become None, and the end that no other agent has yet is
+    rewritten without them and with one NOT_FOUND fact per tile.
+    """
+
+    def __init__(self) -> None:
+        self.facts = []  # The facts from position base on, None for a sighting that was dropped
+        self.base = 0  # Amount of facts that were dropped from the start
+
+    def __len__(self) -> int:
+        return self.base + len(self.facts)
+
+    def append(self, fact: tuple) -> None:
+        self.facts.append(fact)
+
+    def between(self, start: int, end: int) -> list:
+        """
+        Get the facts between two positions
+        :param start: Position of the first fact, at least base
+        :param end: Position after the last fact
+        :return: List of facts, without the dropped sightings
+        """
+        return [fact for fact in self.facts[start - self.base:end - self.base] if fact is not None]
+
+    def compact(self, low: int, high: int, oldest=None) -> None:
+        """
+        Drop the facts nobody can still need
+        :param low: Amount of facts that every other agent knows
+        :param high: Most facts another agent knows
+        :param oldest: Tick of the oldest sightings that are still remembered, None to keep every sighting
+        :return: None
+        """
+        del self.facts[:low - self.base]
+        self.base = low
+
+        if oldest is not None:  # Others already know the part up to high, its facts have to keep their position
+            for index, fact in enumerate(self.facts[:high - self.base]):
+                if fact is not None and fact[0] == SIGHTING and fact[3] < oldest:
+                    self.facts[index] = None
+
+        # Nobody else knows the end yet, it can be rewritten
+        end, merged = [], {}  # (x, y) -> index of its NOT_FOUND fact in end
+        for fact in self.facts[high - self.base:]:
+            if fact is None or (oldest is not None and fact[0] == SIGHTING and fact[3] < oldest):
+                continue
+            if fact[0] == NOT_FOUND:
+                if fact[1:3] in merged:
+                    index = merged[fact[1:3]]
+                    end[index] = (NOT_FOUND, fact[1], fact[2], end[index][3] + fact[3])
+                    continue
+                merged[fact[1:3]] = len(end)
+            end.append(fact)
+        self.facts[high - self.base:] = end
+
+    def footprint(self) -> int:
+        """
+        Estimate the amount of bytes the log uses
+        :return: int
+        """
+        size = sys.getsizeof(self.facts)
+        for fact in self.facts:
+            if fact is not None:
+                size += sys.getsizeof(fact) + (sys.getsizeof(fact[4]) if fact[0] == SIGHTING else 0)
+        return size
+
+
+class Knowledge:
+    """
+    What an agent knows and can share, as a log of facts per agent that first observed them.
+    Facts are only ever appended to a log, so the amount of facts an agent knows of a log is the version of what it
+    knows about the agent that observed them, and these amounts together form a version vector. Two agents that meet
+    only send each other the end of the logs the other one hasn't got yet, what they already shared is never sent again.
+    Logs are compacted with compact, so they stay as long as what can still be of use instead of growing every tick.
+    After sharing, every agent of a group has the same version vector, which they keep as one shared dictionary. From
+    then on every agent notes which logs grew, so the next time only those have to be compared.
+
+    Facts are tuples:
+    (SIGHTING, x, y, timestep, types): types of the objects the agent saw on a tile, food and enemies included
+    (NOT_FOUND, x, y, amount): the agent counted amount times that a tile had no food
+    (VISITED, x, y): the agent visited a tile for the first time
+    """
+
+    def __init__(self, owner: int) -> None:
+        """
+        :param owner: Entity id of the agent
+        """
+        self.owner = owner
+        self.log = Log()  # Facts the agent observed itself
+        self.logs = {owner: self.log}  # Entity id of the agent that observed the facts -> the log of that agent
+        self.known = {owner: 0}  # Entity id -> amount of facts known of that agent, the start of its log
+        self.synced = {}  # Version vector of the last time the agent shared, shared with the rest of that group
+        self.changed = set()  # Entity ids of the logs that grew since then
+
+    def record(self, fact: tuple) -> None:
+        """
+        Add a fact the agent observed itself
+        :param fact: The fact
+        :return: None
+        """
+        self.log.append(fact)
+        self.known[self.owner] = len(self.log)
+        self.changed.add(self.owner)
+
+    def version(self) -> dict:
+        """
+        Get the version vector
+        :return: Dictionary of entity id -> amount of facts known of that agent
+        """
+        return dict(self.known)
+
+    def receive(self, origin: int, log: Log, length: int) -> None:
+        """
+        Know more facts of another agent
+        :param origin: Entity id of the agent that observed the facts
+        :param log: The log of that agent
+        :param length: Amount of facts of the log that are known now
+        :return: None
+        """
+        self.logs[origin] = log
+        self.known[origin] = length
+        self.changed.add(origin)
+
+    def footprint(self) -> int:
+        """
+        Estimate the amount of bytes the knowledge uses, the logs of other agents are counted with those agents
+        :return: int
+        """
+        size = sys.getsizeof(self.logs) + sys.getsizeof(self.known) + sys.getsizeof(self.changed)
+        return size + self.log.footprint()
+
+
+def contact_groups(players: list, tiles) -> list:
+    """
+    Group the players that can communicate, directly or through other players in the group.
+    Players can communicate when they are on the same or on adjacent tiles, like Player.can_communicate.
+    :param players: The players
+    :param tiles: The entire Grid
+    :return: List of groups of at least two players, every group a list
+    """
+    cells = {}  # (x, y) -> players on the tile
+    for player in players:
+        cells.setdefault(player.index(), []).append(player)
+
+    # Union-find over the occupied tiles, every tile is joined with its occupied neighbours
+    parents = {cell: cell for cell in cells}
+
+    def root(cell):
+        while parents[cell] != cell:
+            parents[cell] = parents[parents[cell]]
+            cell = parents[cell]
+        return cell
+
+    for x, y in cells:
+        for dx, dy in FOUR:
+            if (x + dx, y + dy) in cells:
+                parents[root((x + dx, y + dy))] = root((x, y))
+
+    groups = {}
+    for cell, members in cells.items():
+        groups.setdefault(root(cell), []).extend(members)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def share(group: list, tiles) -> int:
+    """
+    Let a group of players that can communicate bring each other up to date.
+    The version vectors of the group tell per observing agent which player knows the most of it, that player hands
+    every other player only the part of the log it's missing. Players that shared together before start from the same
+    synced vector, so it is enough to compare the distinct synced vectors once and the logs that grew since. The cost
+    is the facts that are new to someone, not every pair of players comparing everything they know.
+    :param group: Players with knowledge
+    :param tiles: The entire Grid
+    :return: Amount of facts that were sent
+    """
+    # Every player knows at least its synced vector, plus the logs that grew since
+    synced = {}  # id of a synced vector -> (the vector, a player that has it)
+    for player in group:
+        synced.setdefault(id(player.knowledge.synced), (player.knowledge.synced, player))
+    latest = {}  # Entity id -> (amount of facts, player that knows them)
+    for version, player in synced.values():
+        for origin, length in version.items():
+            if length > latest.get(origin, (0, None))[0]:
+                latest[origin] = (length, player)
+    changed = set()
+    for player in group:
+        for origin in player.knowledge.changed:
+            changed.add(origin)
+            length = player.knowledge.known[origin]
+            if length > latest.get(origin, (0, None))[0]:
+                latest[origin] = (length, player)
+
+    # A player can only be behind on the logs its synced vector is behind on and the logs that grew
+    behind = {key: {origin for origin, (length, source) in latest.items() if version.get(origin, 0) < length}
+              for key, (version, player) in synced.items()}
+    sent = 0
+    for player in group:
+        knowledge = player.knowledge
+        for origin in sorted(behind[id(knowledge.synced)] | changed):  # Same order however the sets were built
+            length, source = latest[origin]
+            known = knowledge.known.get(origin, 0)
+            if known < length:
+                log = source.knowledge.logs[origin]
+                facts = log.between(known, length)
+                knowledge.receive(origin, log, length)
+                player.learn(facts, tiles)
+                sent += len(facts)
+
+    version = {origin: length for origin, (length, source) in latest.items()}
+    for player in group:
+        player.knowledge.synced = version
+        player.knowledge.changed = set()
+    return sent
+
+
+def compact(players: list, timestep: int) -> None:
+    """
+    Compact the logs of the players that share knowledge. The start of a log that every other player knows is
+    dropped, and the sightings that are older than the memory horizon of the player that made them are dropped too.
+    :param players: Every player with knowledge, also the ones that never met
+    :param timestep: Current tick
+    :return: None
+    """
+    low, high, holders = {}, {}, {}  # Entity id -> least and most facts another player knows, amount of them
+    for player in players:
+        for origin, length in player.knowledge.known.items():
+            if origin != player.knowledge.owner:
+                low[origin] = min(low.get(origin, length), length)
+                high[origin] = max(high.get(origin, 0), length)
+                holders[origin] = holders.get(origin, 0) + 1
+
+    for player in players:
+        knowledge, horizon = player.knowledge, player.memory.horizon
+        owner = knowledge.owner
+        everyone = holders.get(owner, 0) == len(players) - 1  # Players that never heard of it know 0 facts
+        knowledge.log.compact(low[owner] if everyone else 0, high.get(owner, 0),
+                              timestep - horizon + 1 if horizon is not None else None)
+        knowledge.known[owner] = len(knowledge.log)
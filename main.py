@@ -1,39 +1,17 @@
 import pygame
-import random
 import sys
-from player import Player
-from food import Food
-from tile import Tile
-from weapon import Weapon
-from object_spawner import ObjectSpawner
+from engine import Simulation, create_world
+from viewer import Viewer
+from trajectory import Trajectory, Playback
+from runner import Runner
 from config import *
 
 
-def get_random_tile(tiles: [[Tile]]) -> Tile:
-    """
-    Get a random tile from the grid
-    :param tiles: The entire Grid
-    :return: A random tile from the Grid
-    """
-    return random.choice(random.choice(tiles))
-
-
-def check_collision(players: [Player], object: Weapon or Food, tiles: [[Tile]]) -> bool:
-    if type(object) == Weapon:
-        for player in players:
-            if player.collision_weapon(weapon=object, tiles=tiles):
-                return True
-    elif type(object) == Food:
-        for player in players:
-            if player.collision_food(food=object, tiles=tiles):
-                return True
-    return False
-
-
-def initialize() -> ([[Tile]], [Player], [Weapon], [Food], ObjectSpawner, pygame.surface.Surface, pygame.time.Clock):
+def initialize(seed=None) -> (Simulation, pygame.surface.Surface, pygame.time.Clock):
     """
     Initialize game and set variables
-    :return: Tuple that includes all initialized variables
+    :param seed: Seed for the random number generator
+    :return: Tuple that includes the simulation, the screen and the clock
     """
     # PyGame initialization
     pygame.init()
@@ -45,46 +23,13 @@ def initialize() -> ([[Tile]], [Player], [Weapon], [Food], ObjectSpawner, pygame
     # Start clock
     clock = pygame.time.Clock()
 
-    # Create grid
-    tiles = [[Tile(x=x * TILE_SIZE + TILE_SIZE // 2, y=y * TILE_SIZE + TILE_SIZE // 2, size=TILE_SIZE,
-                   color=(255, 255, 255)) for y in range(TILES_HIGH)] for x in range(TILES_WIDE)]
-
-    # Initialize weapon on random tile
-    random_tile = get_random_tile(tiles)
-    weapon = Weapon(x=random_tile.x, y=random_tile.y, size=TILE_SIZE // 2, color=(255, 215, 100), visible=True, damage=6)
-    random_tile.objects.append(weapon)
-
-    # Initialize food on random tile
-    random_tile = get_random_tile(tiles)
-    food = Food(x=random_tile.x, y=random_tile.y, size=TILE_SIZE // 2, color=(0, 255, 0), visible=True)
-    random_tile.objects.append(food)
-
-    # Initialize spawner
-    spawner = ObjectSpawner(x=TILES_WIDE, y=TILES_HIGH)
-    spawner.set_specific_chance_in_grid(x=10, y=10, chance=200)
-
-    # Initialize 10 players on random tiles
-    players = []
-    for i in range(10):
-        random_tile = get_random_tile(tiles)
-        players.append(Player(x=random_tile.x, y=random_tile.y, radius=TILE_SIZE // 2, color=(0, 0, 255), speed=TILE_SIZE,
-                              max_hunger=40, max_health=20))
-        players[i].reset_map(tiles)
-        x, y = random_tile.index()
-        tiles[x][y].append(player=players[i])
+    return create_world(seed=seed, share_knowledge=True), screen, clock
 
-    return tiles, players, weapon, food, spawner, screen, clock
 
-
-def main(tiles: [[Tile]], players: [Player], weapons: [Weapon], foods: [Food], spawner: ObjectSpawner,
-         screen: pygame.surface.Surface, clock: pygame.time.Clock, timestep=0) -> None:
+def main(simulation: Simulation, screen: pygame.surface.Surface, clock: pygame.time.Clock) -> None:
     """
-    Run the game
-    :param tiles: The entire Grid
-    :param players: The agents
-    :param weapons: List of all weapons
-    :param foods: List of all foods
-    :param spawner: The object spawner
+    Run the game, the viewer steps the simulation on key presses
+    :param simulation: The simulation to view
     :param screen: Pygame surface
     :param clock: Pygame clock
     :return: None
@@ -93,23 +38,23 @@ def main(tiles: [[Tile]], players: [Player], weapons: [Weapon], foods: [Food], s
     keys = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]
     differences = [(0, -1), (0, 1), (-1, 0), (1, 0)]
     selected_player = None
+    players = simulation.players
+    viewer = Viewer(simulation=simulation, screen=screen)
+    viewer.redraw()
 
     while True:
-        for event in pygame.event.get():
+        # Sleep until something happens, an idle viewer doesn't have to draw anything
+        for event in [pygame.event.wait()] + pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
 
+            elif event.type == pygame.VIDEOEXPOSE:
+                viewer.redraw()
+
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    timestep += 1
-
-                    for player in players:
-                        player.update_behaviour(tiles=tiles, timestep=timestep)
-
-                    food = spawner.spawn_food(tiles)
-                    if food is not None:
-                        foods.append(food)
+                    simulation.step()
 
                 # TODO: Dit is code om een player te besturen met pijltjes, na het testen weghalen
                 if event.key in digits:
@@ -122,56 +67,94 @@ def main(tiles: [[Tile]], players: [Player], weapons: [Weapon], foods: [Food], s
                     print(f'No player selected')
 
                 if event.key in keys and selected_player is not None:
-                    timestep += 1
-
-                    dx, dy = differences[keys.index(event.key)]
-                    selected_player.move(dx=dx, dy=dy, tiles=tiles)
-                    selected_player.update_memory(timestep=timestep, tiles=tiles)  # Update memory
-                    selected_player.update_hunger(amount=-1)  # Change hunger with -1
+                    simulation.step(moves={selected_player: differences[keys.index(event.key)]})
 
-                    food = spawner.spawn_food(tiles)
-                    if food is not None:
-                        foods.append(food)
-
-                for player in players:
-                    if player.can_communicate(tiles=tiles):
-                        print(f'{player} can communicate')
-
-        # Fill background
-        screen.fill((255, 255, 255))
-
-        # Draw tiles
-        for x in range(TILES_WIDE):
-            for y in range(TILES_HIGH):
-                tiles[x][y].draw(screen)
-
-        # Draw player
-        for player in players:
-            player.draw(screen)
+        viewer.draw()  # Only draws what changed
+        clock.tick(60)
 
-        # Draw weapon
-        for weapon in weapons:
-            weapon.draw(screen)
 
-        # Draw foods
-        for food in foods:
-            food.draw(screen)
+def auto_run(simulation: Simulation, screen: pygame.surface.Surface, clock: pygame.time.Clock, tick_rate=None) -> None:
+    """
+    Let the simulation run by itself on a worker thread and show the latest tick at 60 frames per second, space pauses
+    and resumes it
+    :param simulation: The simulation to run
+    :param screen: Pygame surface
+    :param clock: Pygame clock
+    :param tick_rate: Amount of ticks per second, None to run as fast as possible
+    :return: None
+    """
+    world = simulation.tiles
+    playback = Playback(width=world.width, height=world.height, tile_size=world.tile_size)
+    runner = Runner(simulation=simulation, tick_rate=tick_rate)
+    playback.show(runner.snapshot[1], runner.snapshot[0])
+    viewer = Viewer(simulation=playback, screen=screen)
+    viewer.redraw()
+    runner.start()
 
-        # Check collision between player and weapons
-        for weapon in weapons:
-            if check_collision(players=players, object=weapon, tiles=tiles):
-                weapons.remove(weapon)
+    while True:
+        for event in pygame.event.get():  # Don't wait for events, the simulation changes by itself
+            if event.type == pygame.QUIT:
+                runner.stop()
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.VIDEOEXPOSE:
+                viewer.redraw()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                if runner.paused:
+                    runner.resume()
+                else:
+                    runner.pause()
+
+        tick, records = runner.latest()
+        if tick != playback.timestep:
+            playback.show(records, tick)
+            pygame.display.set_caption(f'Hunger Games - tick {tick}')
+        viewer.draw()
+        clock.tick(60)
 
-        # Check collisions between player and foods
-        for food in foods:
-            if check_collision(players=players, object=food, tiles=tiles):
-                foods.remove(food)
 
-        pygame.display.update()
+def review(path: str) -> None:
+    """
+    Scrub through a stored trajectory: left and right go one tick, up and down 100, page up and page down 10000,
+    home and end to the first and last tick. Keys repeat while they are held.
+    :param path: File of the trajectory
+    :return: None
+    """
+    trajectory = Trajectory(path)
+    pygame.init()
+    screen = pygame.display.set_mode(size=(trajectory.width * trajectory.tile_size,
+                                           trajectory.height * trajectory.tile_size))
+    clock = pygame.time.Clock()
+    pygame.key.set_repeat(300, 30)
+    steps = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1, pygame.K_DOWN: -100, pygame.K_UP: 100, pygame.K_PAGEDOWN: -10000,
+             pygame.K_PAGEUP: 10000, pygame.K_HOME: -trajectory.last_tick - 1, pygame.K_END: trajectory.last_tick + 1}
+
+    playback = Playback(width=trajectory.width, height=trajectory.height, tile_size=trajectory.tile_size)
+    playback.show(trajectory.frame(trajectory.first_tick), trajectory.first_tick)
+    viewer = Viewer(simulation=playback, screen=screen)
+    viewer.redraw()
+    while True:
+        for event in [pygame.event.wait()] + pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.VIDEOEXPOSE:
+                viewer.redraw()
+            elif event.type == pygame.KEYDOWN and event.key in steps:
+                tick = trajectory.clamp(playback.timestep + steps[event.key])
+                playback.show(trajectory.frame(tick), tick)
+        pygame.display.set_caption(f'Hunger Games - tick {playback.timestep}')
+        viewer.draw()
         clock.tick(60)
 
 
 if __name__ == "__main__":
-    tiles, players, weapon, food, spawner, screen, clock, = initialize()
+    if len(sys.argv) > 1 and sys.argv[1] != '--auto':  # python main.py run.traj views a stored run
+        review(sys.argv[1])
+
+    simulation, screen, clock = initialize()
 
-    main(tiles=tiles, players=players, weapons=[weapon], foods=[food], spawner=spawner, screen=screen, clock=clock)
+    if len(sys.argv) > 1:  # python main.py --auto [ticks per second] runs the simulation by itself
+        auto_run(simulation=simulation, screen=screen, clock=clock,
+                 tick_rate=float(sys.argv[2]) if len(sys.argv) > 2 else None)
+    main(simulation=simulation, screen=screen, clock=clock)
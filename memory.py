@@ -0,0 +1,127 @@
+import heapq
+import sys
+
+
+class Memory:
+    """
+    Memory of an agent, a dictionary of timestep -> (tile, types of the objects on the tile).
+    With a horizon only the last horizon ticks are remembered, older memories are forgotten when new ones come in.
+    Memories other agents shared are learned: they count for the listeners like the agent's own memories and with a
+    horizon they are forgotten the same way, but they don't take the place of an own memory of their tick.
+    Listeners get remember(tile, objects, timestep) and forget(tile, objects, timestep) calls, so statistics that are
+    derived from the memory stay consistent with it.
+    """
+
+    def __init__(self, horizon=None, decay=1.0, listeners=()) -> None:
+        if not 0 < decay <= 1:
+            raise ValueError(f'decay has to be above 0 and at most 1, not {decay}')
+        self.horizon = horizon
+        self.decay = decay
+        self.listeners = list(listeners)
+        self.entries = {}  # Timestep -> (tile, objects), oldest first
+        self.tiles = {}  # Tile -> amount of own memories of the tile
+        self.learned = {}  # Timestep -> list of learned (tile, objects), only kept with a horizon
+        self.learned_ticks = []  # Heap of the timesteps in learned
+        self.now = 0  # Latest tick that was remembered or learned
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, timestep: int) -> bool:
+        return timestep in self.entries
+
+    def __getitem__(self, timestep: int) -> tuple:
+        return self.entries[timestep]
+
+    def __setitem__(self, timestep: int, memory: tuple) -> None:
+        if timestep in self.entries:  # Replace an earlier memory of this tick
+            self.forget(timestep)
+        self.entries[timestep] = memory
+        self.tiles[memory[0]] = self.tiles.get(memory[0], 0) + 1
+        for listener in self.listeners:
+            listener.remember(*memory, timestep)
+
+        self.now = max(self.now, timestep)
+        if self.horizon is not None:
+            self.expire()
+
+    def __delitem__(self, timestep: int) -> None:
+        self.forget(timestep)
+
+    def forget(self, timestep: int) -> None:
+        """
+        Remove a memory and let the listeners undo it
+        :param timestep: Tick of the memory
+        :return: None
+        """
+        memory = self.entries.pop(timestep)
+        self.tiles[memory[0]] -= 1
+        if not self.tiles[memory[0]]:
+            del self.tiles[memory[0]]
+        for listener in self.listeners:
+            listener.forget(*memory, timestep)
+
+    def learn(self, timestep: int, memory: tuple) -> None:
+        """
+        Add a memory another agent shared
+        :param timestep: Tick of the memory
+        :param memory: Tuple (tile, types of the objects on the tile)
+        :return: None
+        """
+        self.now = max(self.now, timestep)
+        if self.horizon is not None and self.now - timestep >= self.horizon:  # Already too old to remember
+            return
+        for listener in self.listeners:
+            listener.remember(*memory, timestep)
+
+        if self.horizon is not None:
+            if timestep not in self.learned:
+                heapq.heappush(self.learned_ticks, timestep)
+                self.learned[timestep] = []
+            self.learned[timestep].append(memory)
+            self.expire()
+
+    def expire(self) -> None:
+        """
+        Forget the own and learned memories that are at least horizon ticks older than the latest one
+        :return: None
+        """
+        while self.entries and self.now - next(iter(self.entries)) >= self.horizon:
+            self.forget(next(iter(self.entries)))
+        while self.learned_ticks and self.now - self.learned_ticks[0] >= self.horizon:
+            timestep = heapq.heappop(self.learned_ticks)
+            for memory in self.learned.pop(timestep):
+                for listener in self.listeners:
+                    listener.forget(*memory, timestep)
+
+    def count(self, tile) -> int:
+        """
+        Amount of own memories of a tile, learned memories don't count
+        :param tile: Tile
+        :return: int
+        """
+        return self.tiles.get(tile, 0)
+
+    def items(self):
+        return self.entries.items()
+
+    def values(self):
+        return self.entries.values()
+
+    def footprint(self) -> int:
+        """
+        Estimate the amount of bytes the memory uses, the tiles themselves belong to the world and don't count
+        :return: int
+        """
+        size = sys.getsizeof(self.entries)
+        for timestep, (tile, objects) in self.entries.items():
+            size += sys.getsizeof(timestep) + sys.getsizeof((tile, objects)) + sys.getsizeof(objects)
+        size += sys.getsizeof(self.tiles) + sys.getsizeof(self.learned) + sys.getsizeof(self.learned_ticks)
+        for memories in self.learned.values():
+            size += sys.getsizeof(memories)
+            for tile, objects in memories:
+                size += sys.getsizeof((tile, objects)) + sys.getsizeof(objects)
+        return size
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Offsets (dx, dy) of the neighbourhoods, the four neighbours are in the order agents have always looked at them:
+# east, west, south, north
+FOUR = ((1, 0), (-1, 0), (0, 1), (0, -1))
+EIGHT = FOUR + ((1, 1), (-1, 1), (1, -1), (-1, -1))
+
+
+def radius(k: int) -> tuple:
+    """
+    Get the offsets of all tiles within k steps along both axes, the nearest ring first
+    :param k: Radius in tiles
+    :return: Tuple of offsets (dx, dy)
+    """
+    offsets = [(dx, dy) for dx in range(-k, k + 1) for dy in range(-k, k + 1) if dx or dy]
+    return tuple(sorted(offsets, key=lambda offset: max(abs(offset[0]), abs(offset[1]))))
+
+
+class Stencil:
+    """
+    The neighbours of the tiles of a grid for one neighbourhood.
+    The neighbours of a tile are worked out the first time they're asked for and kept, so every later query for that
+    tile is one dictionary lookup without building any lists. Neighbours past the edge of the grid are left out.
+    """
+
+    def __init__(self, width: int, height: int, offsets=FOUR, tile=None) -> None:
+        """
+        :param width: Amount of tiles from left to right
+        :param height: Amount of tiles from top to bottom
+        :param offsets: Offsets (dx, dy) of the neighbours
+        :param tile: Function that gets the object of a tile from (x, y), None to give the (x, y) indexes themselves
+        """
+        self.width = width
+        self.height = height
+        self.offsets = offsets
+        self.tile = tile
+        self.dx = np.array([dx for dx, dy in offsets])
+        self.dy = np.array([dy for dx, dy in offsets])
+        self.neighbours = {}  # (x, y) -> tuple of neighbours
+
+    def of(self, x: int, y: int) -> tuple:
+        """
+        Get the neighbours of a tile
+        :param x: x index
+        :param y: y index
+        :return: Tuple of neighbours in the order of the offsets
+        """
+        neighbours = self.neighbours.get((x, y))
+        if neighbours is None:
+            cells = [(x + dx, y + dy) for dx, dy in self.offsets
+                     if 0 <= x + dx < self.width and 0 <= y + dy < self.height]
+            neighbours = tuple(cells) if self.tile is None else tuple(self.tile(*cell) for cell in cells)
+            self.neighbours[(x, y)] = neighbours
+        return neighbours
+
+    def arrays(self, xs, ys):
+        """
+        Get the neighbours of many tiles at once
+        :param xs: Array of x indexes
+        :param ys: Array of y indexes
+        :return: Tuple of the x indexes, y indexes and whether the neighbour is on the grid, all with a row per tile and
+                 a column per offset. Indexes of neighbours past the edge are moved onto the edge so they can be used
+                 to index arrays of the grid.
+        """
+        neighbour_xs = xs[:, None] + self.dx
+        neighbour_ys = ys[:, None] + self.dy
+        inside = (neighbour_xs >= 0) & (neighbour_xs < self.width) & (neighbour_ys >= 0) & (neighbour_ys < self.height)
+        return (np.clip(neighbour_xs, 0, self.width - 1), np.clip(neighbour_ys, 0, self.height - 1), inside)
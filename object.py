@@ -1,4 +1,7 @@
-import pygame
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pygame
 
 
 class Object:
@@ -9,6 +12,6 @@ class Object:
         self.color = color
         self.visible = visible
 
-    def draw(self, screen: pygame.surface.Surface) -> None:
-        if self.visible is True:
-            pygame.draw.circle(surface=screen, color=self.color, center=(self.x, self.y), radius=self.size)
\ No newline at end of file
+    def draw(self, screen: 'pygame.surface.Surface') -> None:
+        from drawing import draw_object
+        draw_object(self, screen)
\ No newline at end of file
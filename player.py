@@ -1,11 +1,22 @@
-import pygame
 import random
-from food import Food
+import sys
+from typing import TYPE_CHECKING
 from tile import Tile
+from food_probabilities import FoodProbabilities
+from memory import Memory
+from visited_map import VisitedMap
+from knowledge import SIGHTING, NOT_FOUND, VISITED
+from world import PLAYER, ENEMY, FOOD, WEAPON
+
+if TYPE_CHECKING:
+    import pygame
 
 
 class Player:
-    def __init__(self, x: int, y: int, radius, color, speed, max_hunger, max_health) -> None:
+    kind = PLAYER
+
+    def __init__(self, x: int, y: int, radius, color, speed, max_hunger, max_health, memory_horizon=None,
+                 memory_decay=1.0, rng=random, look_ahead=3, distance_field=None) -> None:
         self.x = x
         self.y = y
         self.radius = radius
@@ -18,35 +29,54 @@ class Player:
         self.health = max_health
         self.weapon = None
         self.damage = 2
+        self.rng = rng
 
-        self.not_food = {}
-        self.map_has_visited = [[]]
-        self.memory = {}
+        self.food_probabilities = FoodProbabilities(decay=memory_decay)
+        self.map_has_visited = VisitedMap()
+        self.memory = Memory(horizon=memory_horizon, decay=memory_decay, listeners=[self.food_probabilities])
         self.direction = None
         self.amount_of_steps = 0
+        self.look_ahead = look_ahead  # Amount of tiles the agent looks ahead when it chooses a direction
+        self.distance_field = distance_field  # Shared DistanceField to walk to food with, None to use the memory
         self.hotspot = None
+        self.knowledge = None  # Knowledge to share with other players, None for a player that doesn't communicate
 
         self.has_visited = []
+        self.decisions = {"Random Move": 0, "Go To Highest Food Probability": 0}  # How often every action was chosen
 
     def __str__(self) -> str:
         return f'Player at {self.index()}'
 
     def update_behaviour(self, tiles, timestep):
         action = self.choose_action(tiles)  # Kies een actie
+        self.decisions[action] += 1
         self.perform_action(action, tiles)  # Voer de gekozen actie uit
 
         self.update_memory(timestep, tiles)  # Update memory
         self.update_hunger(-1)  # Verander honger met -1
 
+    def steer(self, dx: int, dy: int, tiles: [[Tile]], timestep: int) -> None:
+        """
+        Move the Agent by hand instead of letting it choose, it remembers and gets hungry like after a move of its own
+        :param dx: Difference in x
+        :param dy: Difference in y
+        :param tiles: The entire Grid
+        :param timestep: Current tick
+        :return: None
+        """
+        self.move(dx=dx, dy=dy, tiles=tiles)
+        self.update_memory(timestep=timestep, tiles=tiles)
+        self.update_hunger(-1)
+
     def choose_action(self, tiles):
         """ Return Possible Actions: [Random Move, Go To Highest Food Probability]"""
         if self.hunger > self.max_hunger / 2:  # Beweeg random als de agent boven max_hunger / 2 is
             return "Random Move"
         elif self.hunger <= self.max_hunger / 2:  # Ga naar voedsel met hoogste kans op voedsel
-            probabilities = self.calculate_food_probabilities(tiles, False)
-            for tile, probability in probabilities.items():
-                if tile not in self.has_visited:
-                    return "Go To Highest Food Probability"
+            if self.distance_field is not None:  # Ga naar het dichtstbijzijnde voedsel of hotspot
+                return "Go To Highest Food Probability" if self.distance_field.reachable(*self.index()) else "Random Move"
+            if self.food_probabilities.best(exclude=self.has_visited) is not None:
+                return "Go To Highest Food Probability"
             return "Random Move"  # Als er geen tiles zijn, dan random move
 
     def perform_action(self, action, tiles):
@@ -56,17 +86,21 @@ class Player:
             self.go_to_highest_food_probability(tiles)
 
     def go_to_highest_food_probability(self, tiles):
-        probabilities = self.calculate_food_probabilities(tiles, False)
-
         detected_food = self.detect_food(tiles)  # Check if the player finds food, else this variable is None
         if detected_food:  # If the player found food
             goal = max(detected_food, key=lambda k: detected_food[k])  # Target tile for the agent
             self.move((goal.x + 15 - (self.x + 15)) // (self.radius * 2), (goal.y + 15 - (self.y + 15)) // (self.radius * 2), tiles)  # Move the player closer to the tile
+        elif self.distance_field is not None:
+            step = self.distance_field.next_step(*self.index())  # None when the player waits on a hotspot
+            if step is not None:
+                self.move(*step, tiles)
         else:
-            for tile, probability in probabilities.items():  # Ga naar tile waar hij nog niet is geweest.
-                if tile.index() == self.index() and tile not in self.has_visited:  # Als de player op een tile zit in de lijst, voeg hem dan aan de lijst
+            tile = self.food_probabilities.best(exclude=self.has_visited)  # Ga naar tile waar hij nog niet is geweest.
+            while tile is not None:
+                if tile.index() == self.index():  # Als de player op de tile zit, voeg hem dan aan de lijst
                     self.has_visited.append(tile)
-                elif tile not in self.has_visited:
+                    tile = self.food_probabilities.best(exclude=self.has_visited)
+                else:
                     self.go_to_tile(tile, tiles)
                     break
 
@@ -77,32 +111,13 @@ class Player:
         """
         return self.x // self.speed, self.y // self.speed
 
-    def add_grids(self, x: int, y: int, minimum=0, maximum=19) -> [(int, int)]:
-        """
-        Get the indexes of the possible grids
-        :param x: int
-        :param y: int
-        :param minimum: int
-        :param maximum: int
-        :return: List of Tuples (int, int): x and y index of grid
-        """
-        lst = []
-        if minimum < x < maximum:
-            lst += [(x + 1, y), (x - 1, y)]
-        elif x == minimum:
-            lst += [(x + 1, y)]
-        elif x == maximum:
-            lst += [(x - 1, y)]
-        return lst
-
-    def get_adjacent_tiles(self, tiles: [[Tile]]) -> [Tile]:
+    def get_adjacent_tiles(self, tiles: [[Tile]]) -> (Tile,):
         """
         Get the Agent's adjacent tiles
         :param tiles: The entire Grid
-        :return: A list with all adjacent tiles
+        :return: A tuple with all adjacent tiles: east, west, south and north, as far as they are on the grid
         """
-        x, y = self.index()  # Current position
-        return [tiles[x][y] for x, y in self.add_grids(x=x, y=y) + [coords[::-1] for coords in self.add_grids(x=y, y=x)]]
+        return tiles.neighbours(*self.index())
 
     def move(self, dx: int, dy: int, tiles: [[Tile]]) -> None:
         """
@@ -112,8 +127,9 @@ class Player:
         :param tiles: The entire Grid
         :return: None
         """
-        x, y = self.index()
-        self.map_has_visited[x][y] = 1
+        if self.knowledge is not None and self.index() not in self.map_has_visited:
+            self.knowledge.record((VISITED, *self.index()))
+        self.map_has_visited.add(self.index())
 
         new_x = self.x + dx * self.speed  # Next x-coordinate
         new_y = self.y + dy * self.speed  # Next y-coordinate
@@ -122,8 +138,7 @@ class Player:
                 0 < new_y < bottom_right_tile.y + bottom_right_tile.size):
             self.x = new_x  # Set new x-coordinate
             self.y = new_y  # Set new y-coordinate
-            tiles[x][y].objects.remove(self)
-            tiles[new_x // self.speed][new_y // self.speed].append(self)
+            tiles.move(self, new_x // self.speed, new_y // self.speed)
 
     def go_to_tile(self, tile: Tile, tiles: [[Tile]]) -> None:
         """
@@ -166,9 +181,9 @@ class Player:
         """
         food_dict = {}
         for tile in self.get_adjacent_tiles(tiles):
-            for object in tile.objects:
-                if isinstance(object, Food):
-                    food_dict[tile] = food_dict.get(tile, 0) + 1
+            amount = tile.count(FOOD)
+            if amount:
+                food_dict[tile] = amount
         return food_dict
 
     def calculate_food_probabilities(self, tiles: [[Tile]], update_probability: bool) -> dict:
@@ -178,23 +193,15 @@ class Player:
         :param update_probability: Boolean if the probability has to be updated
         :return: Sorted dictionary of food probabilities
         """
-        food_tiles = {}
-        for timestep in self.memory:
-            tile, objects = self.memory[timestep]
-            if Food in objects:
-                food_tiles[tile] = food_tiles.get(tile, 0) + 1
-
         if update_probability:  # If the probability has to be updated:
             for tile in self.get_adjacent_tiles(tiles=tiles):
-                for timestep in self.memory:
-                    tile_memory, objects = self.memory[timestep]
-                    if tile == tile_memory and Food not in [type(object) for object in tile.objects]:
-                        self.not_food[tile] = self.not_food.get(tile, 0) + 1
-
-        for tile in food_tiles:
-            food_tiles[tile] /= food_tiles[tile] + self.not_food.get(tile, 0)
+                if tile.count(FOOD) == 0:  # Every memory of this tile counts as not finding food
+                    self.food_probabilities.add_not_found(tile, self.food_probabilities.remembered.get(tile, 0))
+                    amount = self.memory.count(tile)  # Learned memories are counted by the players that shared them
+                    if self.knowledge is not None and amount:
+                        self.knowledge.record((NOT_FOUND, *tile.index(), amount))
 
-        return dict(reversed(sorted(food_tiles.items(), key=lambda item: item[1])))
+        return self.food_probabilities.sorted()
 
     def reset_map(self, tiles: [[Tile]]) -> None:
         """
@@ -202,7 +209,7 @@ class Player:
         :param tiles: The entire Grid
         :return: None
         """
-        self.map_has_visited = [[0 for num_tile in range(len(tiles))] for tile in tiles]
+        self.map_has_visited = VisitedMap()
 
     def update_memory(self, timestep: int, tiles: [[Tile]]) -> None:
         """
@@ -214,7 +221,38 @@ class Player:
         x, y = self.index()
         tile, objects = (tiles[x][y], tiles[x][y].objects)
         if objects:
-            self.memory[timestep] = (tile, [type(object) for object in objects])
+            types = [type(object) for object in objects]
+            self.memory[timestep] = (tile, types)  # Also updates the food counts
+            if self.knowledge is not None and any(kind.kind in (FOOD, ENEMY) for kind in types):
+                self.knowledge.record((SIGHTING, x, y, timestep, types))
+
+    def learn(self, facts: list, tiles: [[Tile]]) -> None:
+        """
+        Take over facts another player observed, as if the Agent observed them itself
+        :param facts: Facts of that player the Agent didn't know yet, see knowledge.py
+        :param tiles: The entire Grid
+        :return: None
+        """
+        for fact in facts:
+            if fact[0] == SIGHTING:  # Counts like a memory and is forgotten with the horizon like one
+                _, x, y, timestep, types = fact
+                self.memory.learn(timestep, (tiles[x][y], types))
+            elif fact[0] == NOT_FOUND:
+                _, x, y, amount = fact
+                self.food_probabilities.add_not_found(tiles[x][y], amount)
+            else:
+                self.map_has_visited.add(fact[1:])
+
+    def memory_footprint(self) -> int:
+        """
+        Estimate the amount of bytes the Agent uses to remember things
+        :return: int
+        """
+        size = self.memory.footprint() + self.food_probabilities.footprint() + sys.getsizeof(self.has_visited)
+        size += self.map_has_visited.footprint()
+        if self.knowledge is not None:
+            size += self.knowledge.footprint()
+        return size
 
     def choose_direction(self, tiles: [[Tile]], amount_tiles: int) -> str:
         """
@@ -224,70 +262,20 @@ class Player:
         :param amount_tiles: Amount of tiles the Agent can see ahead of him
         :return: Direction with the most amount of tiles that aren't explored yet
         """
-        directions = {"north": 0, "east": 0, "south": 0, "west": 0}
         x, y = self.index()
-        for i in range(x - 1, max(x - amount_tiles - 1, -1), -1):  # Check west direction
-            if self.map_has_visited[i][y] == 0:
-                directions["west"] += 1
-        for i in range(x + 1, min(x + amount_tiles + 1, len(tiles))):  # Check east direction
-            if self.map_has_visited[i][y] == 0:
-                directions["east"] += 1
-        for j in range(y - 1, max(y - amount_tiles - 1, -1), -1):  # Check north direction
-            if self.map_has_visited[x][j] == 0:
-                directions["north"] += 1
-        for j in range(y + 1, min(y + amount_tiles + 1, len(tiles[0]))):  # Check south direction
-            if self.map_has_visited[x][j] == 0:
-                directions["south"] += 1
+        visited = self.map_has_visited
+        west, east = max(x - amount_tiles, 0), min(x + amount_tiles + 1, len(tiles))
+        north, south = max(y - amount_tiles, 0), min(y + amount_tiles + 1, len(tiles[0]))
+        directions = {"north": y - north - visited.count_column(x, north, y),
+                      "east": east - x - 1 - visited.count_row(y, x + 1, east),
+                      "south": south - y - 1 - visited.count_column(x, y + 1, south),
+                      "west": x - west - visited.count_row(y, west, x)}
 
         return max(directions, key=directions.get)
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
-        # Calculate the width and height of the hunger bar
-        bar_width = self.radius * 2
-        bar_height = 10
-
-        # Calculate the position of the hunger bar
-        bar_x = self.x - self.radius
-        bar_y = self.y + self.radius + 5
-
-        # Calculate the percentage of hunger remaining
-        percent_remaining = self.hunger / self.max_hunger
-
-        # Calculate the color of the hunger bar
-        if percent_remaining > 0.5:
-            bar_color = (0, 255, 0)
-        elif percent_remaining > 0.25:
-            bar_color = (255, 255, 0)
-        else:
-            bar_color = (255, 0, 0)
-
-        # Draw the hunger bar
-        pygame.draw.rect(screen, (128, 128, 128), (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(screen, bar_color, (bar_x, bar_y, bar_width * percent_remaining, bar_height))
-
-        # Calculate the width and height of the health bar
-        bar_width = self.radius * 2
-        bar_height = 5
-
-        # Calculate the position of the health bar
-        bar_x = self.x - self.radius
-        bar_y = self.y - self.radius - 10
-
-        # Calculate the percentage of health remaining
-        percent_remaining = self.health / self.max_health
-
-        # Calculate the color of the health bar
-        if percent_remaining > 0.5:
-            bar_color = (0, 255, 0)
-        elif percent_remaining > 0.25:
-            bar_color = (255, 255, 0)
-        else:
-            bar_color = (255, 0, 0)
-
-        # Draw the health bar
-        pygame.draw.rect(screen, (128, 128, 128), (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(screen, bar_color, (bar_x, bar_y, bar_width * percent_remaining, bar_height))
+    def draw(self, screen: 'pygame.surface.Surface') -> None:
+        from drawing import draw_player
+        draw_player(self, screen)
 
     def update_hunger(self, amount: int):
         """
@@ -322,7 +310,7 @@ class Player:
             base_damage = self.damage + self.weapon.damage
         else:
             base_damage = self.damage
-        return random.randint(base_damage - 2, base_damage + 2)
+        return self.rng.randint(base_damage - 2, base_damage + 2)
 
     def random_move(self, tiles: [[Tile]], TILE_SIZE) -> None:
         """
@@ -331,8 +319,8 @@ class Player:
         :return: None
         """
         if self.amount_of_steps == 0:  # If the player is in its starting position
-            self.direction = self.choose_direction(tiles, 3)
-            self.amount_of_steps = 3  # Add amount of taken steps to agent
+            self.direction = self.choose_direction(tiles, self.look_ahead)
+            self.amount_of_steps = self.look_ahead  # Add amount of taken steps to agent
         detected_food = self.detect_food(tiles)  # Check if the player finds food, else this variable is None
         if detected_food:  # If the player found food
             goal = max(detected_food, key=lambda k: detected_food[k])  # Target tile for the agent
@@ -341,44 +329,26 @@ class Player:
         else:
             self.move_direction(tiles)  # Move the player with different logic
 
-    def collision_food(self, food: Food, tiles: [[Tile]]) -> bool:
-        """
-        Check for collisions with food object
-        :param food: Food item
-        :param tiles: The entire grid
-        :return: boolean
-        """
-        distance = ((self.x - food.x) ** 2 + (self.y - food.y) ** 2) ** 0.5
-        if distance < self.radius + food.size:
-            food.collision_detected(self)
-            x, y = self.index()
-            tiles[x][y].objects.remove(food)
-            self.has_visited = []
-            return True
-        return False
-
-    def collision_weapon(self, weapon, tiles):
+    def pick_up_items(self, tiles: [[Tile]]) -> list:
         """
-        Check for collisions with weapons
-        :param weapon: Weapon object
+        Pick up all weapons and foods on the Agent's tile
         :param tiles: The entire grid
-        :return: None
+        :return: List of the picked up items
         """
-        distance = ((self.x - weapon.x) ** 2 + (self.y - weapon.y) ** 2) ** 0.5
-        if distance < self.radius + weapon.size:
-            weapon.collision_detected(self)
-            x, y = self.index()
-            tiles[x][y].objects.remove(weapon)
-            return True
-        return False
+        x, y = self.index()
+        items = tiles.find_all(WEAPON, x, y) + tiles.find_all(FOOD, x, y)
+        for item in items:
+            item.collision_detected(self)
+            tiles[x][y].remove(item)
+            if item.kind == FOOD:
+                self.has_visited = []
+        return items
 
     def can_communicate(self, tiles: [[Tile]]) -> bool:
         x, y = self.index()
-        for object in tiles[x][y].objects:
-            if object != self and Player == type(object):
-                return True
+        if tiles[x][y].count(PLAYER) > 1:  # The agent itself is also on this tile
+            return True
         for adjacent_tile in self.get_adjacent_tiles(tiles=tiles):
-            for object in adjacent_tile.objects:
-                if object != self and Player == type(object):
-                    return True
+            if adjacent_tile.count(PLAYER) > 0:
+                return True
         return False
\ No newline at end of file
@@ -0,0 +1,268 @@
+import numpy as np
+from chunks import VisitedMaps
+from neighbours import FOUR
+from world import World, PLAYER, FOOD, WEAPON
+from event_log import MOVE
+
+# Directions in the order Player.choose_direction prefers them on a tie
+NORTH, EAST, SOUTH, WEST = range(4)
+DIRECTIONS = ("north", "east", "south", "west")
+DIRECTION_X = np.array([0, 1, 0, -1])
+DIRECTION_Y = np.array([-1, 0, 1, 0])
+
+# Neighbours in the order Player.get_adjacent_tiles returns them: east, west, south, north
+NEIGHBOUR_X = np.array([dx for dx, dy in FOUR])
+NEIGHBOUR_Y = np.array([dy for dx, dy in FOUR])
+
+
+class Population:
+    """
+    A group of agents stored as a structure of arrays instead of Player objects.
+    Every tick all agents are updated at once with array operations, following the same policy as
+    Player.update_behaviour: random moves while the agent isn't hungry, otherwise to the remembered food tile it hasn't
+    visited yet. The agents are counted in the player layer of the world, but are not entities in it.
+
+    Player only ever calculates its food probabilities without updating them, so every remembered food tile has a
+    chance of 1 and the best tile is the one where food was first seen most recently. That is what food_seen holds.
+    The food tiles and visited tiles are stored sparsely, so the memory grows with what the agents saw instead of with
+    the size of the world.
+    """
+
+    def __init__(self, world: World, xs, ys, max_hunger: int, max_health: int, look_ahead=3) -> None:
+        self.world = world
+        self.size = len(xs)
+        self.max_hunger = max_hunger
+        self.max_health = max_health
+        self.look_ahead = look_ahead
+
+        self.x = np.array(xs, dtype=np.int32)  # Tile index of every agent
+        self.y = np.array(ys, dtype=np.int32)
+        self.hunger = np.full(self.size, max_hunger, dtype=np.int32)
+        self.health = np.full(self.size, max_health, dtype=np.int32)
+        self.weapon = np.zeros(self.size, dtype=np.int32)  # Damage of the held weapon, 0 without one
+        self.direction = np.full(self.size, -1, dtype=np.int8)  # Index in DIRECTIONS, -1 before the first choice
+        self.amount_of_steps = np.zeros(self.size, dtype=np.int32)
+        self.random_moves = np.zeros(self.size, dtype=np.int32)  # How often every agent chose a random move
+        self.food_moves = np.zeros(self.size, dtype=np.int32)  # How often every agent chose to go to food
+
+        self.cell_count = world.width * world.height
+        self.map_has_visited = VisitedMaps(width=world.width, height=world.height)
+
+        # Remembered food tiles, sorted by agent * cell_count + flat tile index
+        self.food_keys = np.zeros(0, dtype=np.int64)
+        self.food_seen = np.zeros(0, dtype=np.int32)  # Tick food was first remembered
+        self.food_visited = np.zeros(0, dtype=bool)  # The agent went to the tile without finding food
+
+        # The agents get a block of entity ids, so they can be told apart from the entities in the world
+        self.ids = np.arange(world.next_id, world.next_id + self.size, dtype=np.int32)
+        world.next_id += self.size
+
+        world.counts.add_at(PLAYER, self.x, self.y, 1)
+
+    def cells(self, agents=None):
+        """
+        Get the flat tile index of agents
+        :param agents: Indexes of the agents, None for all of them
+        :return: Array of flat tile indexes
+        """
+        if agents is None:
+            return self.x * self.world.height + self.y
+        return self.x[agents] * self.world.height + self.y[agents]
+
+    def update_behaviour(self, timestep: int) -> None:
+        """
+        Let every agent choose and perform an action, remember its tile and get hungrier
+        :param timestep: Current tick
+        :return: None
+        """
+        # Choose an action, hungry agents go to food when they remember a food tile they haven't visited yet
+        hungry = np.flatnonzero(self.hunger <= self.max_hunger / 2)
+        best = np.full(self.size, -1)
+        best[hungry] = self.best_food_tile(hungry)
+        go_to_food = best >= 0
+        random_move = ~go_to_food
+        self.random_moves += random_move
+        self.food_moves += go_to_food
+
+        # Food on an adjacent tile always wins
+        food_direction = self.detect_food()
+        detected = food_direction >= 0
+
+        # Random move: pick a new direction after every few steps and follow it
+        new_direction = np.flatnonzero(random_move & (self.amount_of_steps == 0))
+        self.direction[new_direction] = self.choose_direction(new_direction)
+        self.amount_of_steps[new_direction] = self.look_ahead
+        follow = np.flatnonzero(random_move & ~detected)
+        self.amount_of_steps[follow] -= 1
+
+        # Go to food: the best remembered tile, skipping it when the agent is already there
+        searching = np.flatnonzero(go_to_food & ~detected)
+        target = best[searching]
+        here = np.flatnonzero(target == self.cells(searching))
+        self.food_visited[self.food_positions(searching[here], target[here])] = True
+        target[here] = self.best_food_tile(searching[here])
+        moving = target >= 0
+        searching, target = searching[moving], target[moving]
+
+        # Move everyone that acts this tick
+        dx = np.zeros(self.size, dtype=np.int32)
+        dy = np.zeros(self.size, dtype=np.int32)
+        dx[detected] = NEIGHBOUR_X[food_direction[detected]]
+        dy[detected] = NEIGHBOUR_Y[food_direction[detected]]
+        dx[follow] = DIRECTION_X[self.direction[follow]]
+        dy[follow] = DIRECTION_Y[self.direction[follow]]
+        step_x = np.sign(target // self.world.height - self.x[searching])  # Along the x-axis first
+        step_y = np.where(step_x != 0, 0, np.sign(target % self.world.height - self.y[searching]))
+        dx[searching] = step_x
+        dy[searching] = step_y
+
+        movers = np.zeros(self.size, dtype=bool)
+        movers[detected] = True
+        movers[follow] = True
+        movers[searching] = True
+        self.move(np.flatnonzero(movers), dx[movers], dy[movers])
+
+        # Remember food on the new tiles and get hungrier
+        food_here = np.flatnonzero(self.world.counts.take(FOOD, self.x, self.y) > 0)
+        self.remember_food(food_here, timestep)
+        np.subtract(self.hunger, 1, out=self.hunger)
+        np.maximum(self.hunger, 0, out=self.hunger)
+
+    def detect_food(self):
+        """
+        Look for food on the adjacent tiles of every agent
+        :return: Per agent the index in NEIGHBOUR_X/Y of the adjacent tile with the most food, -1 if there is none
+        """
+        xs, ys, inside = self.world.stencil(FOUR).arrays(self.x, self.y)
+        food = np.where(inside, self.world.counts.take(FOOD, xs, ys), 0)
+        return np.where(food.max(axis=1) > 0, food.argmax(axis=1), -1)
+
+    def choose_direction(self, agents):
+        """
+        Per agent pick the direction with the most tiles it hasn't visited within its look ahead
+        :param agents: Indexes of the agents
+        :return: Array of indexes in DIRECTIONS
+        """
+        width, height = self.world.width, self.world.height
+        x, y = self.x[agents], self.y[agents]
+        scores = np.zeros((len(agents), 4), dtype=np.int32)
+        for direction in range(4):
+            for distance in range(1, self.look_ahead + 1):
+                xs = x + DIRECTION_X[direction] * distance
+                ys = y + DIRECTION_Y[direction] * distance
+                inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+                visited = self.map_has_visited.visited(agents, np.clip(xs, 0, width - 1), np.clip(ys, 0, height - 1))
+                scores[:, direction] += inside & ~visited
+        return scores.argmax(axis=1)
+
+    def food_positions(self, agents, cells):
+        """
+        Get the positions of remembered food tiles in the food arrays
+        :param agents: Indexes of the agents
+        :param cells: Flat tile index per agent, every tile has to be remembered by its agent
+        :return: Array of positions
+        """
+        return np.searchsorted(self.food_keys, agents.astype(np.int64) * self.cell_count + cells)
+
+    def remember_food(self, agents, timestep: int) -> None:
+        """
+        Remember the tiles of agents as food tiles, tiles that are already remembered keep their tick
+        :param agents: Sorted indexes of the agents
+        :param timestep: Current tick
+        :return: None
+        """
+        keys = agents.astype(np.int64) * self.cell_count + self.cells(agents)
+        positions = np.searchsorted(self.food_keys, keys)
+        known = positions < len(self.food_keys)
+        known[known] = self.food_keys[positions[known]] == keys[known]
+        positions, keys = positions[~known], keys[~known]
+        self.food_keys = np.insert(self.food_keys, positions, keys)
+        self.food_seen = np.insert(self.food_seen, positions, timestep)
+        self.food_visited = np.insert(self.food_visited, positions, False)
+
+    def best_food_tile(self, agents):
+        """
+        Per agent get the food tile it hasn't visited yet where food was first seen most recently
+        :param agents: Sorted indexes of the agents
+        :return: Array of flat tile indexes, -1 for agents without a tile
+        """
+        best = np.full(len(agents), -1)
+        starts = np.searchsorted(self.food_keys, agents.astype(np.int64) * self.cell_count)
+        ends = np.searchsorted(self.food_keys, (agents.astype(np.int64) + 1) * self.cell_count)
+        remembers = np.flatnonzero(ends > starts)
+        if not remembers.size:
+            return best
+
+        # The most recent tick per agent, every tile of an agent was first seen on a different tick
+        seen = np.append(np.where(self.food_visited, 0, self.food_seen), 0)  # reduceat needs an index past the end
+        bounds = np.column_stack((starts[remembers], ends[remembers])).reshape(-1)
+        latest = np.maximum.reduceat(seen, bounds)[::2]
+        remembers, latest = remembers[latest > 0], latest[latest > 0]
+
+        lengths = ends[remembers] - starts[remembers]
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.repeat(starts[remembers], lengths) + offsets
+        positions = positions[seen[positions] == np.repeat(latest, lengths)]
+        best[remembers] = self.food_keys[positions] % self.cell_count
+        return best
+
+    def move(self, agents, dx, dy) -> None:
+        """
+        Move agents one tile if that stays on the map, their old tile is marked as visited either way
+        :param agents: Indexes of the agents
+        :param dx: Difference in x per agent
+        :param dy: Difference in y per agent
+        :return: None
+        """
+        x, y = self.x[agents], self.y[agents]
+        self.map_has_visited.mark(agents, x, y)
+
+        new_x, new_y = x + dx, y + dy
+        inside = (new_x >= 0) & (new_x < self.world.width) & (new_y >= 0) & (new_y < self.world.height)
+        agents, x, y, new_x, new_y = agents[inside], x[inside], y[inside], new_x[inside], new_y[inside]
+
+        self.world.counts.add_at(PLAYER, x, y, -1)
+        self.world.counts.add_at(PLAYER, new_x, new_y, 1)
+        self.x[agents] = new_x
+        self.y[agents] = new_y
+        if self.world.recorder is not None:
+            self.world.recorder.extend(MOVE, PLAYER, self.ids[agents], new_x, new_y)
+
+    def pick_up_items(self) -> (int, int):
+        """
+        Let agents pick up the weapons and foods on their tiles, the first agent on a tile gets all items on it
+        :return: Amount of picked up foods and weapons
+        """
+        counts = self.world.counts
+        agents = np.flatnonzero(counts.take(FOOD, self.x, self.y) + counts.take(WEAPON, self.x, self.y) > 0)
+        if not agents.size:
+            return 0, 0
+        _, first = np.unique(self.cells(agents), return_index=True)
+
+        foods = weapons = 0
+        for agent in agents[np.sort(first)]:
+            x, y = int(self.x[agent]), int(self.y[agent])
+            for item in self.world.find_all(WEAPON, x, y) + self.world.find_all(FOOD, x, y):
+                self.world.remove(item, x, y)
+                if self.world.recorder is not None:
+                    self.world.recorder.pickup(int(self.ids[agent]), item.entity_id, item.kind, x, y)
+                if item.kind == FOOD:
+                    item.visible = 0
+                    self.hunger[agent] = min(self.hunger[agent] + item.nutrition, self.max_hunger)
+                    start = np.searchsorted(self.food_keys, agent * self.cell_count)
+                    end = np.searchsorted(self.food_keys, (agent + 1) * self.cell_count)
+                    self.food_visited[start:end] = False
+                    foods += 1
+                else:
+                    self.weapon[agent] = item.damage
+                    weapons += 1
+        return foods, weapons
+
+    def memory_footprint(self) -> int:
+        """
+        Amount of bytes the arrays of the population use
+        :return: int
+        """
+        arrays = (self.x, self.y, self.hunger, self.health, self.weapon, self.direction, self.amount_of_steps,
+                  self.random_moves, self.food_moves, self.food_keys, self.food_seen, self.food_visited)
+        return sum(array.nbytes for array in arrays) + self.map_has_visited.nbytes()
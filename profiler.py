@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Phases of a tick, render is timed by the viewer
+BEHAVIOUR, SPAWN, COLLISION, RENDER = range(4)
+PHASES = ('behaviour', 'spawn', 'collision', 'render')
+
+
+class Profiler:
+    """
+    Times every phase of a tick and keeps the last window of durations per phase in a ring buffer.
+    The simulation only calls it when one is attached, so a run without a profiler pays nothing but a None check per
+    phase.
+    """
+
+    def __init__(self, simulation=None, window=1000, path=None, interval=1.0) -> None:
+        """
+        :param simulation: Simulation whose decision counters are reported, None to leave them out
+        :param window: Amount of ticks the statistics are taken over
+        :param path: JSON file the report is written to every interval, None to not write one
+        :param interval: Seconds between two writes of the report
+        """
+        self.simulation = simulation
+        self.window = window
+        self.path = path
+        self.interval = interval
+
+        self.durations = np.zeros((len(PHASES), window), dtype=np.int64)  # Nanoseconds, ring buffer per phase
+        self.samples = [0] * len(PHASES)  # Amount of durations ever added per phase
+        self.tick_ends = np.zeros(window, dtype=np.int64)  # Ring buffer of the time every tick ended
+        self.ticks = 0
+        self.lap_start = 0
+        self.last_write = time.monotonic()
+        self.server = None
+
+    def start_tick(self) -> None:
+        self.lap_start = time.perf_counter_ns()
+
+    def lap(self, phase: int) -> None:
+        """
+        Add the time since the start of the tick or the previous lap to a phase
+        :param phase: BEHAVIOUR, SPAWN or COLLISION
+        :return: None
+        """
+        now = time.perf_counter_ns()
+        self.add(phase, now - self.lap_start)
+        self.lap_start = now
+
+    def add(self, phase: int, duration: int) -> None:
+        """
+        Add a duration to a phase
+        :param phase: One of the phases
+        :param duration: Nanoseconds
+        :return: None
+        """
+        self.durations[phase, self.samples[phase] % self.window] = duration
+        self.samples[phase] += 1
+
+    def end_tick(self) -> None:
+        self.tick_ends[self.ticks % self.window] = time.perf_counter_ns()
+        self.ticks += 1
+        if self.path is not None and time.monotonic() - self.last_write >= self.interval:
+            self.write()
+
+    def ticks_per_second(self) -> float:
+        """
+        Rolling amount of ticks per second over the window
+        :return: float, 0 until two ticks ended at different times
+        """
+        count = min(self.ticks, self.window)
+        if count < 2:
+            return 0.0
+        ends = self.tick_ends[:count]
+        elapsed = int(ends.max() - ends.min())
+        if not elapsed:  # Ticks faster than the clock resolution
+            return 0.0
+        return (count - 1) / elapsed * 1e9
+
+    def report(self) -> dict:
+        """
+        Summarize the window
+        :return: Dictionary with the amount of ticks, ticks per second, the p50, p99 and mean latency of every phase
+                 in milliseconds and the decisions of the agents
+        """
+        phases = {}
+        for phase, name in enumerate(PHASES):
+            count = min(self.samples[phase], self.window)
+            if not count:
+                continue
+            durations = self.durations[phase, :count] / 1e6
+            p50, p99 = np.percentile(durations, (50, 99))
+            phases[name] = {'p50_ms': float(p50), 'p99_ms': float(p99), 'mean_ms': float(durations.mean()),
+                            'samples': self.samples[phase]}
+
+        report = {'ticks': self.ticks, 'ticks_per_second': self.ticks_per_second(), 'phases': phases}
+        if self.simulation is not None:
+            report['decisions'] = self.simulation.decisions()
+        return report
+
+    def text(self) -> str:
+        """
+        The report as lines of 'name value', easy to read for people and scrapers
+        :return: str
+        """
+        report = self.report()
+        lines = [f"ticks {report['ticks']}", f"ticks_per_second {report['ticks_per_second']:.2f}"]
+        for name, statistics in report['phases'].items():
+            lines += [f'{name}_{key} {value:.4f}' if isinstance(value, float) else f'{name}_{key} {value}'
+                      for key, value in statistics.items()]
+        lines += [f'decisions_{name} {amount}' for name, amount in report.get('decisions', {}).items()]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=None) -> None:
+        """
+        Write the report to a JSON file, readers never see a half written file
+        :param path: File to write to, None for the path of the profiler
+        :return: None
+        """
+        path = path or self.path
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.report(), file, indent=2)
+        os.replace(path + '.tmp', path)
+        self.last_write = time.monotonic()
+
+    def serve(self, port=8000, host='127.0.0.1') -> 'ThreadingHTTPServer':
+        """
+        Serve the report over HTTP on a background thread: / gives JSON, /metrics gives text
+        :param port: Port to listen on, 0 for any free port
+        :param host: Address to listen on, only the local machine by default
+        :return: The server, shutdown() stops it
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Slow to import, only needed here
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == '/metrics':
+                    body, content_type = profiler.text().encode(), 'text/plain'
+                else:
+                    body, content_type = json.dumps(profiler.report()).encode(), 'application/json'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass  # Don't print a line for every request
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
@@ -0,0 +1,88 @@
+import threading
+import time
+from engine import Simulation
+from trajectory import snapshot
+
+
+class Runner:
+    """
+    Runs a simulation on a worker thread, as fast as possible or at a fixed tick rate, while another thread shows it.
+    The worker never waits for the viewer: after a tick it only takes a snapshot of the entities when the viewer asked
+    for one since the last snapshot, and hands it over by replacing one reference. The viewer always gets the latest
+    complete snapshot right away, so slow frames only skip ticks on screen and never slow the simulation down.
+    """
+
+    def __init__(self, simulation: Simulation, tick_rate=None) -> None:
+        """
+        :param simulation: The simulation, only the worker touches it while it runs
+        :param tick_rate: Amount of ticks per second, None to run as fast as possible
+        """
+        self.simulation = simulation
+        self.tick_rate = tick_rate
+        self.snapshot = (simulation.timestep, snapshot(simulation))  # (tick, records) the viewer gets
+        self.wanted = threading.Event()  # The viewer wants a newer snapshot
+        self.running = threading.Event()  # Cleared to pause the worker
+        self.stopped = False
+        self.error = None  # Exception of the worker thread, raised in the viewer thread
+        self.worker = threading.Thread(target=self.work, daemon=True)
+
+    def start(self) -> None:
+        self.running.set()
+        self.worker.start()
+
+    def pause(self) -> None:
+        self.running.clear()
+
+    def resume(self) -> None:
+        self.running.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self.running.is_set()
+
+    def work(self) -> None:
+        """
+        Step the simulation until the runner is stopped, runs on the worker thread
+        :return: None
+        """
+        simulation = self.simulation
+        deadline = time.perf_counter()
+        try:
+            while not self.stopped:
+                if not self.running.is_set():
+                    if self.snapshot[0] != simulation.timestep:  # Show the tick it paused on
+                        self.snapshot = (simulation.timestep, snapshot(simulation))
+                    self.running.wait(0.1)
+                    deadline = time.perf_counter()
+                    continue
+                simulation.step()
+                if self.wanted.is_set():
+                    self.wanted.clear()
+                    self.snapshot = (simulation.timestep, snapshot(simulation))
+                if self.tick_rate is not None:
+                    deadline = max(deadline + 1 / self.tick_rate, time.perf_counter() - 1)  # Catch up at most a second
+                    time.sleep(max(deadline - time.perf_counter(), 0))
+        except Exception as error:
+            self.error = error
+
+    def latest(self) -> tuple:
+        """
+        Get the latest snapshot and ask the worker for a newer one
+        :return: Tuple (tick, records) with the records of every entity, see trajectory.snapshot
+        """
+        if self.error is not None:
+            raise self.error
+        self.wanted.set()
+        return self.snapshot
+
+    def stop(self) -> None:
+        """
+        Stop the worker after its current tick and wait for it
+        :return: None
+        """
+        self.stopped = True
+        self.running.set()
+        if self.worker.is_alive():
+            self.worker.join()
+        if self.error is not None:
+            raise self.error
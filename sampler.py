@@ -0,0 +1,84 @@
+import random
+import numpy as np
+
+
+class FenwickSampler:
+    """Weighted sampler over a fixed number of cells, backed by a Fenwick tree so weights can change in O(log N)"""
+
+    def __init__(self, weights) -> None:
+        self.weights = np.array(weights, dtype=np.float64).reshape(-1)
+        self.size = len(self.weights)
+        self.tree = np.zeros(self.size + 1)
+        self.tree[1:] = self.weights
+        self.positive = int(np.count_nonzero(self.weights > 0))  # Rounding leaves a tiny total when all weights are 0
+
+        # Build the tree in O(N) by pushing every node into its parent, one level of the tree at a time
+        step = 1
+        while step <= self.size:
+            children = np.arange(step, self.size + 1, 2 * step)
+            parents = children + step
+            inside = parents <= self.size
+            self.tree[parents[inside]] += self.tree[children[inside]]
+            step *= 2
+
+        self.top_bit = 1
+        while self.top_bit * 2 <= self.size:
+            self.top_bit *= 2
+
+    def update(self, index: int, weight: float) -> None:
+        """
+        Change the weight of one cell
+        :param index: Index of the cell
+        :param weight: The new weight
+        :return: None
+        """
+        delta = weight - self.weights[index]
+        self.positive += int(weight > 0) - int(self.weights[index] > 0)
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self) -> float:
+        """
+        Sum of all weights
+        :return: float
+        """
+        total = 0.0
+        i = self.size
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, value: float) -> int:
+        """
+        Find the cell where the running sum of the weights passes value
+        :param value: Number between 0 and the total weight
+        :return: Index of the cell
+        """
+        position = 0
+        step = self.top_bit
+        while step > 0:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] <= value:
+                position = next_position
+                value -= self.tree[next_position]
+            step //= 2
+
+        # Rounding can push the search past the last cell with any weight
+        while position > 0 and (position >= self.size or self.weights[position] <= 0):
+            position -= 1
+        return position
+
+    def sample(self, rng=random) -> int:
+        """
+        Draw a cell with a chance proportional to its weight
+        :param rng: Random number generator
+        :return: Index of the cell, None if no cell has a positive weight
+        """
+        total = self.total()
+        if total <= 0 or not self.positive:
+            return None
+        return self.find(rng.uniform(0, total))
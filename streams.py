@@ -0,0 +1,31 @@
+import random
+
+
+class RandomStreams:
+    """
+    A separate random number generator per subsystem, all derived from one seed.
+    A change in how often one subsystem draws numbers doesn't shift the numbers any other subsystem gets.
+    """
+
+    NAMES = ('world', 'spawner', 'enemies', 'combat')
+
+    def __init__(self, seed=None) -> None:
+        self.seed = seed
+        for name in self.NAMES:
+            setattr(self, name, random.Random(None if seed is None else f'{seed}:{name}'))
+
+    def getstate(self) -> dict:
+        """
+        Get the state of every generator
+        :return: Name of the generator -> state
+        """
+        return {name: getattr(self, name).getstate() for name in self.NAMES}
+
+    def setstate(self, state: dict) -> None:
+        """
+        Restore the state of every generator
+        :param state: Name of the generator -> state, as returned by getstate
+        :return: None
+        """
+        for name in self.NAMES:
+            getattr(self, name).setstate(state[name])
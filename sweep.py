@@ -0,0 +1,85 @@
+import itertools
+import math
+import multiprocessing
+import os
+from engine import run
+
+METRICS = ('survival_ticks', 'food_eaten', 'weapon_pickups')
+
+
+class RunningStatistics:
+    """Mean, variance, minimum and maximum of a stream of values, without keeping the values (Welford's algorithm)"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float) -> None:
+        """
+        Add a value to the statistics
+        :param value: The new value
+        :return: None
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def standard_deviation(self) -> float:
+        return math.sqrt(self.variance())
+
+    def __str__(self) -> str:
+        return f'{self.mean:.2f} ± {self.standard_deviation():.2f} (n={self.count})'
+
+
+def run_configuration(job: (str, dict, int, int)) -> (str, int, dict):
+    """
+    Run one seeded simulation, this runs in a worker process
+    :param job: Tuple of the name of the configuration, the settings for create_world, the seed and the amount of ticks
+    :return: Tuple of the name, the seed and the summary of the run
+    """
+    name, settings, seed, steps = job
+    return name, seed, run(steps=steps, seed=seed, **settings).summary()
+
+
+def sweep(configurations: {str: dict}, seeds, steps: int, workers=None, callback=None) -> {str: {str: RunningStatistics}}:
+    """
+    Run every configuration with every seed on a pool of processes and aggregate the summaries as they come in
+    :param configurations: Name of every configuration -> settings for create_world,
+                           for example {'hunger 40': {'max_hunger': 40, 'hotspots': ((10, 10, 200),)}}
+    :param seeds: Seeds to run every configuration with
+    :param steps: Amount of ticks per run
+    :param workers: Amount of processes, None for one per core
+    :param callback: Function that gets (name, seed, summary) of every finished run
+    :return: Name of every configuration -> metric -> RunningStatistics
+    """
+    results = {name: {metric: RunningStatistics() for metric in METRICS} for name in configurations}
+    seeds = list(seeds)
+    jobs = ((name, settings, seed, steps) for name, settings in configurations.items() for seed in seeds)
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(configurations) * len(seeds) // (4 * workers))  # Fewer, bigger messages between processes
+
+    with multiprocessing.Pool(processes=workers) as pool:
+        for name, seed, summary in pool.imap_unordered(run_configuration, jobs, chunksize=chunksize):
+            for metric in METRICS:
+                results[name][metric].add(summary[metric])
+            if callback is not None:
+                callback(name, seed, summary)
+    return results
+
+
+if __name__ == "__main__":
+    configurations = {f'players {players}, hunger {hunger}': {'player_count': players, 'max_hunger': hunger}
+                      for players, hunger in itertools.product((5, 10, 20), (20, 40, 80))}
+    results = sweep(configurations=configurations, seeds=range(20), steps=500)
+
+    for name, metrics in results.items():
+        print(name, *(f'{metric}: {statistics}' for metric, statistics in metrics.items()), sep='\t')
@@ -0,0 +1,191 @@
+import glob
+import os
+import queue
+import threading
+import numpy as np
+from world import ENEMY, FOOD, WEAPON
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Without pyarrow the chunks are written as .npz files
+    pyarrow = None
+
+# Columns of the tables and their types
+AGENTS = {'tick': np.uint32, 'agent': np.int32, 'x': np.int32, 'y': np.int32, 'hunger': np.int32, 'health': np.int32,
+          'weapon': np.int32}  # A row per agent per tick, weapon is the damage of the held weapon, 0 without one
+TICKS = {'tick': np.uint32, 'foods': np.int32, 'weapons': np.int32, 'enemies': np.int32}  # A row per tick
+
+
+class Chunk:
+    """Preallocated columns of a table, filled by the simulation and emptied by the writer thread"""
+
+    def __init__(self, columns: dict, size: int) -> None:
+        self.columns = {name: np.zeros(size, dtype=dtype) for name, dtype in columns.items()}
+        self.length = 0
+
+
+class Table:
+    """
+    One table of the telemetry, with two chunks: the simulation fills one while the writer thread writes the other.
+    """
+
+    def __init__(self, telemetry: 'Telemetry', name: str, columns: dict, size: int) -> None:
+        self.telemetry = telemetry
+        self.name = name
+        for file in glob.glob(os.path.join(telemetry.path, f'{name}-*')):  # Chunks of an earlier run would be read too
+            os.remove(file)
+        self.size = size
+        self.free = queue.Queue()  # Chunks that are empty
+        for _ in range(2):
+            self.free.put(Chunk(columns, size))
+        self.chunk = self.free.get()
+        self.chunks = 0  # Amount of chunks handed to the writer
+
+    def extend(self, **columns) -> None:
+        """
+        Add rows to the table
+        :param columns: Array or single value per column, arrays all have the same length
+        :return: None
+        """
+        rows = max(np.size(values) for values in columns.values())
+        start = 0
+        while start < rows:
+            chunk = self.chunk
+            end = min(rows, start + self.size - chunk.length)
+            for name, values in columns.items():
+                chunk.columns[name][chunk.length:chunk.length + end - start] = (
+                    values[start:end] if np.ndim(values) else values)
+            chunk.length += end - start
+            start = end
+            if chunk.length == self.size:
+                self.hand_off()
+
+    def hand_off(self) -> None:
+        """
+        Give the filled chunk to the writer and continue in the other one
+        :return: None
+        """
+        if not self.chunk.length:
+            return
+        self.telemetry.queue.put((self, self.chunks, self.chunk))
+        self.chunks += 1
+        self.chunk = self.free.get()  # Only waits when the writer is a whole chunk behind
+
+
+class Telemetry:
+    """
+    Records the state of every agent every tick for offline analysis: position, hunger, health and held weapon, and
+    per tick the amount of foods, weapons and enemies.
+    Rows go into preallocated column arrays. Full chunks are written by a background thread as Parquet files when
+    pyarrow is installed and as .npz files with an .npy array per column otherwise, so the simulation never waits on
+    the disk and no Python objects are kept per tick.
+    """
+
+    def __init__(self, path: str, chunk_size=1 << 16) -> None:
+        """
+        :param path: Directory to write the chunks to, it's created if needed and chunks of an earlier run are removed
+        :param chunk_size: Amount of rows per chunk
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.queue = queue.Queue()  # (table, chunk number, chunk) to write, None to stop the writer
+        self.error = None  # Exception of the writer thread, raised in the simulation thread
+        self.agents = Table(self, 'agents', AGENTS, chunk_size)
+        self.ticks = Table(self, 'ticks', TICKS, chunk_size)
+        self.writer = threading.Thread(target=self.write, daemon=True)
+        self.writer.start()
+
+    def record(self, simulation) -> None:
+        """
+        Add the state of a simulation at the end of its tick
+        :param simulation: The simulation
+        :return: None
+        """
+        if self.error is not None:
+            raise self.error
+        tick = simulation.timestep
+        if simulation.players:
+            rows = np.array([(player.entity_id, *player.index(), player.hunger, player.health,
+                              player.weapon.damage if player.weapon is not None else 0)
+                             for player in simulation.players], dtype=np.int32)
+            self.agents.extend(tick=tick, agent=rows[:, 0], x=rows[:, 1], y=rows[:, 2], hunger=rows[:, 3],
+                               health=rows[:, 4], weapon=rows[:, 5])
+        population = simulation.population
+        if population is not None and population.size:
+            self.agents.extend(tick=tick, agent=population.ids, x=population.x, y=population.y,
+                               hunger=population.hunger, health=population.health, weapon=population.weapon)
+
+        registry = simulation.tiles.registry
+        enemies = len(registry[ENEMY]) + (simulation.swarm.size if simulation.swarm is not None else 0)
+        self.ticks.extend(tick=tick, foods=len(registry[FOOD]), weapons=len(registry[WEAPON]), enemies=enemies)
+
+    def write(self) -> None:
+        """
+        Write the chunks that are handed off, runs on the writer thread
+        :return: None
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            table, number, chunk = item
+            try:
+                if self.error is None:
+                    write_chunk(os.path.join(self.path, f'{table.name}-{number:06d}'), chunk)
+            except Exception as error:  # Keep emptying the queue, so the simulation never waits on a dead writer
+                self.error = error
+            chunk.length = 0
+            table.free.put(chunk)
+
+    def close(self) -> None:
+        """
+        Write the rows that are left and stop the writer thread
+        :return: None
+        """
+        self.agents.hand_off()
+        self.ticks.hand_off()
+        self.queue.put(None)
+        self.writer.join()
+        if self.error is not None:
+            raise self.error
+
+
+def write_chunk(path: str, chunk: Chunk) -> None:
+    """
+    Write the filled part of a chunk, readers never see a half written file
+    :param path: File to write to, without extension
+    :param chunk: The chunk
+    :return: None
+    """
+    columns = {name: values[:chunk.length] for name, values in chunk.columns.items()}
+    path += '.parquet' if pyarrow is not None else '.npz'
+    with open(path + '.tmp', 'wb') as file:
+        if pyarrow is not None:
+            pyarrow.parquet.write_table(pyarrow.table(columns), file)
+        else:
+            np.savez(file, **columns)
+    os.replace(path + '.tmp', path)
+
+
+def load(path: str, table='agents') -> dict:
+    """
+    Read a table of a telemetry directory back
+    :param path: Directory of the telemetry
+    :param table: 'agents' or 'ticks'
+    :return: Dictionary of column name -> array with the rows of all chunks
+    """
+    columns = AGENTS if table == 'agents' else TICKS
+    parts = {name: [] for name in columns}
+    files = glob.glob(os.path.join(path, f'{table}-*.parquet')) + glob.glob(os.path.join(path, f'{table}-*.npz'))
+    for file in sorted(files):
+        if file.endswith('.parquet'):
+            data = pyarrow.parquet.read_table(file)
+            for name in columns:
+                parts[name].append(data.column(name).to_numpy())
+        else:
+            with np.load(file) as data:
+                for name in columns:
+                    parts[name].append(data[name])
+    return {name: np.concatenate(arrays) if arrays else np.zeros(0, dtype=columns[name])
+            for name, arrays in parts.items()}
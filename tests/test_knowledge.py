@@ -0,0 +1,28 @@
+from engine import create_world
+from food import Food
+from knowledge import Log, SIGHTING, NOT_FOUND, VISITED
+
+
+def test_compact_keeps_positions():
+    log = Log()
+    for fact in [(VISITED, 0, 0), (SIGHTING, 1, 1, 5, [Food]), (SIGHTING, 2, 2, 40, [Food]), (NOT_FOUND, 3, 3, 1),
+                 (SIGHTING, 4, 4, 8, [Food]), (NOT_FOUND, 3, 3, 2), (VISITED, 5, 5)]:
+        log.append(fact)
+
+    log.compact(low=1, high=3, oldest=10)
+
+    assert log.base == 1
+    assert log.between(1, 3) == [(SIGHTING, 2, 2, 40, [Food])]  # The old sighting others know of became None
+    assert log.facts[0] is None
+    assert log.between(3, len(log)) == [(NOT_FOUND, 3, 3, 3), (VISITED, 5, 5)]  # Nobody knew the end yet
+    assert len(log) == 5
+
+
+def test_footprint_stays_flat_in_a_long_shared_run():
+    simulation = create_world(seed=1, share_knowledge=True, memory_horizon=50)
+    samples = []
+    for _ in range(40):
+        simulation.run(100)
+        samples.append(max(player.knowledge.footprint() for player in simulation.players))
+
+    assert max(samples[20:]) <= 1.2 * max(samples[:20])
@@ -1,23 +1,52 @@
-import pygame
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pygame
 
 
 class Tile:
-    def __init__(self, x: int, y: int, size: int, color: (int, int, int)) -> None:
+    def __init__(self, x: int, y: int, size: int, color: (int, int, int), world) -> None:
         self.x = x
         self.y = y
         self.size = size
-        self.color = color
-        self.objects = []
+        self._color = color
+        self.world = world
+
+    @property
+    def color(self) -> (int, int, int):
+        return self._color
+
+    @color.setter
+    def color(self, color: (int, int, int)) -> None:
+        self._color = color
+        self.world.repainted.add(self.index())  # Let the viewer know this tile has to be drawn again
+
+    @property
+    def objects(self) -> tuple:
+        """
+        The entities on this tile, read from the world
+        :return: Tuple of entities
+        """
+        return self.world.objects(*self.index())
 
     def index(self) -> (int, int):
         return self.x // self.size, self.y // self.size
 
-    def append(self, player) -> None:
-        if player not in self.objects:
-            self.objects.append(player)
+    def count(self, kind: int) -> int:
+        """
+        Get the amount of entities of a kind on this tile
+        :param kind: PLAYER, ENEMY, FOOD or WEAPON from world.py
+        :return: int
+        """
+        x, y = self.index()
+        return int(self.world.counts[kind, x, y])
+
+    def append(self, object) -> None:
+        self.world.add(object, *self.index())
+
+    def remove(self, object) -> None:
+        self.world.remove(object, *self.index())
 
-    def draw(self, screen: pygame.surface.Surface) -> None:
-        rect = pygame.Rect(self.x, self.y, self.size, self.size)
-        rect.center = (self.x, self.y)
-        pygame.draw.rect(surface=screen, color=self.color, rect=rect)
-        pygame.draw.rect(surface=screen, color=(0, 0, 0), rect=rect, width=1)
\ No newline at end of file
+    def draw(self, screen: 'pygame.surface.Surface') -> None:
+        from drawing import draw_tile
+        draw_tile(self, screen)
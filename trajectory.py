@@ -0,0 +1,234 @@
+import numpy as np
+from agents.enemy import Enemy
+from food import Food
+from player import Player
+from weapon import Weapon
+from world import World, PLAYER, ENEMY, FOOD, WEAPON
+
+# One fixed width record per entity per tick, 23 bytes on disk. Tile indexes are 32 bit, worlds can be wider than 32767.
+# weapon is the damage of the held weapon for an agent and the damage of the weapon itself for a weapon, 0 otherwise.
+RECORD = np.dtype([('entity', '<i4'), ('kind', 'u1'), ('x', '<i4'), ('y', '<i4'), ('hunger', '<i2'),
+                   ('max_hunger', '<i2'), ('health', '<i2'), ('max_health', '<i2'), ('weapon', '<i2')])
+INDEX = np.dtype([('tick', '<u4'), ('start', '<u8'), ('count', '<u4')])  # Where the records of a tick are
+HEADER = np.dtype([('width', '<u4'), ('height', '<u4'), ('tile_size', '<u4')])
+MAGIC = b'HGTRAJ02'
+INDEX_MAGIC = b'HGTRIX01'
+
+
+class TrajectoryWriter:
+    """
+    Stores the state of every entity at the end of every tick: agents, enemies, food and weapons.
+    Every entity is one fixed width record and a separate index file gives per tick where its records start, so a
+    Trajectory can read any tick without reading the ticks before it. Records are collected in a preallocated buffer
+    and written to the file in big blocks, like the EventLog.
+    """
+
+    def __init__(self, path: str, world: World, buffer_size=1 << 16) -> None:
+        """
+        :param path: File to write the records to, the index is written next to it as path + '.index'
+        :param world: The world that is recorded
+        :param buffer_size: Amount of records that are buffered before they are written
+        """
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.file.write(np.array((world.width, world.height, world.tile_size), dtype=HEADER).tobytes())
+        self.index_file = open(path + '.index', 'wb')
+        self.index_file.write(INDEX_MAGIC)
+
+        self.buffer = np.zeros(buffer_size, dtype=RECORD)
+        self.length = 0
+        self.index = []  # (tick, start, count) of the ticks that are not written yet
+        self.written = 0  # Amount of records in the file and the buffer
+
+    def record(self, simulation) -> None:
+        """
+        Add the state of a simulation at the end of its tick
+        :param simulation: The simulation
+        :return: None
+        """
+        records = snapshot(simulation)
+        start = 0
+        while start < len(records):
+            if self.length == len(self.buffer):
+                self.flush()
+            end = min(len(records), start + len(self.buffer) - self.length)
+            self.buffer[self.length:self.length + end - start] = records[start:end]
+            self.length += end - start
+            start = end
+        self.index.append((simulation.timestep, self.written, len(records)))
+        self.written += len(records)
+
+    def flush(self) -> None:
+        """
+        Write the buffered records and then the index of the ticks they belong to, so the index never points past the
+        end of the file
+        :return: None
+        """
+        self.file.write(self.buffer[:self.length].tobytes())
+        self.file.flush()
+        self.length = 0
+        if self.index:
+            self.index_file.write(np.array(self.index, dtype=INDEX).tobytes())
+            self.index_file.flush()
+            self.index = []
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+        self.index_file.close()
+
+
+def snapshot(simulation):
+    """
+    Get the state of every entity of a simulation as records: the players, the items in the world, the enemies and
+    the agents of the population and the swarm
+    :param simulation: The simulation
+    :return: Array of records
+    """
+    world = simulation.tiles
+    rows = [(player.entity_id, PLAYER, *player.index(), player.hunger, player.max_hunger, player.health,
+             player.max_health, player.weapon.damage if player.weapon is not None else 0)
+            for player in simulation.players]
+    for kind in (FOOD, WEAPON):
+        rows.extend((entity_id, kind, *world.positions[entity_id], 0, 0, 0, 0, getattr(item, 'damage', 0))
+                    for entity_id, item in world.registry[kind].items())
+    rows.extend((entity_id, ENEMY, *world.positions[entity_id], 0, 0, enemy.health, enemy.max_health, 0)
+                for entity_id, enemy in world.registry[ENEMY].items())
+    parts = [np.array(rows, dtype=np.int32).reshape(-1, len(RECORD.names)).T]
+
+    population = simulation.population
+    if population is not None and population.size:
+        parts.append((population.ids, PLAYER, population.x, population.y, population.hunger, population.max_hunger,
+                      population.health, population.max_health, population.weapon))
+    swarm = simulation.swarm
+    if swarm is not None and swarm.size:
+        parts.append((swarm.ids, ENEMY, swarm.x, swarm.y, 0, 0, swarm.health, swarm.max_health, 0))
+
+    records = np.zeros(sum(len(columns[0]) for columns in parts), dtype=RECORD)
+    start = 0
+    for columns in parts:
+        end = start + len(columns[0])
+        for name, values in zip(RECORD.names, columns):
+            records[name][start:end] = values
+        start = end
+    return records
+
+
+class Trajectory:
+    """
+    Reads a stored trajectory back. Both files are memory mapped, getting the records of a tick is one lookup in the
+    index and a slice of the records, however long the run was.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a trajectory')
+            header = np.frombuffer(file.read(HEADER.itemsize), dtype=HEADER)[0]
+        self.width, self.height, self.tile_size = (int(value) for value in header)
+        self.records = map_file(path, RECORD, len(MAGIC) + HEADER.itemsize)
+        self.index = map_file(path + '.index', INDEX, len(INDEX_MAGIC))
+        self.first_tick = int(self.index['tick'][0]) if len(self.index) else 0
+        self.last_tick = int(self.index['tick'][-1]) if len(self.index) else -1
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def clamp(self, tick: int) -> int:
+        """
+        Get the nearest tick that is in the trajectory
+        :param tick: The tick
+        :return: int
+        """
+        return min(max(tick, self.first_tick), self.last_tick)
+
+    def frame(self, tick: int):
+        """
+        Get the records of one tick
+        :param tick: The tick
+        :return: Array of records
+        """
+        if not self.first_tick <= tick <= self.last_tick:
+            raise IndexError(f'tick {tick} is not in the trajectory, it has ticks {self.first_tick} to {self.last_tick}')
+        tick, start, count = self.index[tick - self.first_tick]  # Every tick has an entry, in order
+        return self.records[start:start + count]
+
+
+def map_file(path: str, dtype, offset: int):
+    """
+    Memory map the records of a file, read only
+    :param path: The file
+    :param dtype: Type of the records
+    :param offset: Amount of bytes before the first record
+    :return: Array of records, only the complete ones
+    """
+    with open(path, 'rb') as file:
+        file.seek(0, 2)
+        count = (file.tell() - offset) // dtype.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+
+class Playback:
+    """
+    Shows snapshots of a simulation in the Viewer as if they were the simulation itself, for example the ticks of a
+    stored Trajectory. Showing a snapshot places its entities in a world of its own, reusing the Player, Enemy, Food
+    and Weapon objects of entities that were already shown, so they are drawn with their own draw methods. Jumping to
+    any tick costs the same as stepping to the next.
+    """
+
+    def __init__(self, width: int, height: int, tile_size: int) -> None:
+        """
+        :param width: Amount of tiles from left to right
+        :param height: Amount of tiles from top to bottom
+        :param tile_size: Size of a tile in pixels
+        """
+        self.tiles = World(width=width, height=height, tile_size=tile_size)
+        self.timestep = None
+        self.profiler = None
+        self.shown = {}  # Entity id in the snapshots -> object in the world
+
+    def show(self, records, tick: int) -> None:
+        """
+        Show the state of the entities at the end of a tick
+        :param records: Records of every entity, like Trajectory.frame and snapshot give them
+        :param tick: The tick
+        :return: None
+        """
+        world, size = self.tiles, self.tiles.tile_size
+        shown = {}
+        for entity_id, kind, x, y, hunger, max_hunger, health, max_health, weapon in records.tolist():
+            entity = self.shown.pop(entity_id, None)
+            if entity is None:
+                entity = self.create(kind, weapon)
+            entity.x, entity.y = x * size + size // 2, y * size + size // 2
+            if kind == PLAYER:
+                entity.hunger, entity.max_hunger = hunger, max_hunger
+            if kind in (PLAYER, ENEMY):
+                entity.health, entity.max_health = health, max_health
+            world.add(entity, x, y)  # Moves the entity when it's already in the world
+            shown[entity_id] = entity
+        for entity in self.shown.values():  # Gone since the last tick that was shown
+            world.remove(entity, *world.positions[entity.entity_id])
+        self.shown = shown
+        self.timestep = tick
+
+    def create(self, kind: int, damage: int):
+        """
+        Create an object to show an entity of the trajectory with
+        :param kind: PLAYER, ENEMY, FOOD or WEAPON
+        :param damage: Damage of a weapon
+        :return: The object, not in the world yet
+        """
+        size = self.tiles.tile_size
+        if kind == PLAYER:
+            return Player(x=0, y=0, radius=size // 2, color=(0, 0, 255), speed=size, max_hunger=1, max_health=1)
+        if kind == ENEMY:
+            enemy = Enemy.__new__(Enemy)  # Without a tile, Enemy.__init__ would place it
+            enemy.radius, enemy.color = size // 2, (255, 0, 0)
+            return enemy
+        if kind == FOOD:
+            return Food(x=0, y=0, size=size // 2, color=(0, 255, 0), visible=True)
+        return Weapon(x=0, y=0, size=size // 2, color=(255, 215, 100), visible=True, damage=damage)
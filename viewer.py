@@ -0,0 +1,149 @@
+import pygame
+import time
+from drawing import SpriteCache, bounds
+from engine import Simulation
+from profiler import RENDER
+from world import PLAYER, ENEMY, FOOD, WEAPON
+
+# Order in which the kinds are drawn, later kinds are drawn on top
+DRAW_ORDER = (PLAYER, ENEMY, WEAPON, FOOD)
+
+
+def entity_rect(entity) -> pygame.Rect:
+    """
+    Get the area an entity covers when it's drawn, including its hunger and health bars
+    :param entity: Player, Enemy, Food or Weapon
+    :return: pygame.Rect
+    """
+    return bounds(entity).move(entity.x, entity.y)
+
+
+def entity_state(entity) -> tuple:
+    """
+    Everything that changes what an entity looks like
+    :param entity: Player, Enemy, Food or Weapon
+    :return: Tuple that changes when the entity has to be drawn again
+    """
+    return (entity.x, entity.y, getattr(entity, 'hunger', None), getattr(entity, 'health', None),
+            getattr(entity, 'visible', True))
+
+
+class Viewer:
+    """
+    Draws a simulation on a pygame screen.
+    The grid is drawn once on a background surface. After that only the areas of entities that moved, appeared,
+    disappeared or changed and tiles that changed color are drawn again and sent to the display.
+    Entities are drawn as cached sprites, all blits of a frame go to pygame in one Surface.blits call.
+    """
+
+    def __init__(self, simulation: Simulation, screen: pygame.surface.Surface) -> None:
+        self.simulation = simulation
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size())
+        self.drawn = {}  # Entity id -> (rect, state) of how it was last drawn
+        self.drawn_timestep = None
+        self.sprites = SpriteCache()
+        self.render_background()
+
+    def render_background(self) -> None:
+        """
+        Draw all tiles on the background surface
+        :return: None
+        """
+        world = self.simulation.tiles
+        self.background.fill((255, 255, 255))
+        for x in range(world.width):
+            for y in range(world.height):
+                world[x][y].draw(self.background)
+        world.repainted.clear()
+
+    def entities(self) -> list:
+        """
+        Get all entities in the order they are drawn
+        :return: List of entities
+        """
+        world = self.simulation.tiles
+        return [entity for kind in DRAW_ORDER for entity in world.entities_of(kind)]
+
+    def redraw(self) -> None:
+        """
+        Draw everything and update the entire display
+        :return: None
+        """
+        blits = [(self.background, (0, 0))]
+        self.drawn = {}
+        for entity in self.entities():
+            rect = entity_rect(entity)
+            sprite = self.sprites.get(entity)
+            if sprite is not None:
+                blits.append((sprite[0], rect.topleft))
+            self.drawn[entity.entity_id] = (rect, entity_state(entity))
+        self.screen.blits(blits, doreturn=False)
+        self.drawn_timestep = self.simulation.timestep
+        pygame.display.update()
+
+    def draw(self) -> [pygame.Rect]:
+        """
+        Draw what changed since the last frame and update only those areas of the display
+        :return: List of the updated areas
+        """
+        world = self.simulation.tiles
+        if self.drawn_timestep == self.simulation.timestep and not world.repainted:
+            return []  # Nothing happened, nothing to draw
+        profiler = self.simulation.profiler
+        start = time.perf_counter_ns() if profiler is not None else 0
+
+        dirty = []
+        for x, y in world.repainted:
+            tile = world.tile(x, y)
+            tile.draw(self.background)
+            dirty.append(pygame.Rect(tile.x - tile.size // 2, tile.y - tile.size // 2, tile.size + 1, tile.size + 1))
+        world.repainted.clear()
+
+        entities = self.entities()
+        drawn = {}
+        for entity in entities:
+            state = entity_state(entity)
+            previous = self.drawn.get(entity.entity_id)
+            if previous is not None and previous[1] == state:
+                drawn[entity.entity_id] = previous
+                continue
+            rect = entity_rect(entity)
+            drawn[entity.entity_id] = (rect, state)
+            dirty.append(rect)
+            if previous is not None:
+                dirty.append(previous[0])
+        for entity_id, (rect, state) in self.drawn.items():  # Entities that are gone
+            if entity_id not in drawn:
+                dirty.append(rect)
+
+        self.drawn = drawn
+        self.drawn_timestep = self.simulation.timestep
+        if not dirty:
+            return []
+        if len(dirty) > len(entities):  # Most entities changed, drawing everything once is cheaper than area by area
+            self.redraw()
+            dirty = [self.screen.get_rect()]
+            if profiler is not None:
+                profiler.add(RENDER, time.perf_counter_ns() - start)
+            return dirty
+
+        # Clear every area and draw the entities overlapping it again, only the part inside the area so nothing outside
+        # it changes
+        rects = [drawn[entity.entity_id][0] for entity in entities]
+        sprites = {}
+        blits = []
+        for rect in dirty:
+            blits.append((self.background, rect.topleft, rect))
+            for index in rect.collidelistall(rects):
+                if index not in sprites:
+                    sprites[index] = self.sprites.get(entities[index])
+                if sprites[index] is not None:
+                    area = rect.clip(rects[index])
+                    blits.append((sprites[index][0], area.topleft, area.move(-rects[index].x, -rects[index].y)))
+        self.screen.blits(blits, doreturn=False)
+
+        pygame.display.update(dirty)
+        if profiler is not None:
+            profiler.add(RENDER, time.perf_counter_ns() - start)
+        return dirty
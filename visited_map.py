@@ -0,0 +1,74 @@
+import sys
+
+
+class VisitedMap:
+    """
+    The tiles an agent visited, as a bitset per row and per column in Python ints.
+    Every visit sets one bit in its row and one in its column, so the amount of visited tiles on a straight line from
+    any tile is a shift, a mask and a bit count: scoring a direction costs the same for any look ahead.
+    Only rows and columns with a visited tile take memory.
+    """
+
+    def __init__(self) -> None:
+        self.rows = {}  # y -> bitset with bit x set for every visited tile in the row
+        self.columns = {}  # x -> bitset with bit y set for every visited tile in the column
+        self.size = 0
+
+    def add(self, cell: (int, int)) -> None:
+        x, y = cell
+        row = self.rows.get(y, 0)
+        if row >> x & 1:
+            return
+        self.rows[y] = row | 1 << x
+        self.columns[x] = self.columns.get(x, 0) | 1 << y
+        self.size += 1
+
+    def __contains__(self, cell: (int, int)) -> bool:
+        x, y = cell
+        return bool(self.rows.get(y, 0) >> x & 1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        for y, row in self.rows.items():
+            x = 0
+            while row:
+                if row & 1:
+                    yield x, y
+                row >>= 1
+                x += 1
+
+    def count_row(self, y: int, start: int, stop: int) -> int:
+        """
+        Count the visited tiles in a row from start up to stop
+        :param y: y index of the row
+        :param start: First x index
+        :param stop: x index after the last one
+        :return: int
+        """
+        if stop <= start:
+            return 0
+        return (self.rows.get(y, 0) >> start & (1 << stop - start) - 1).bit_count()
+
+    def count_column(self, x: int, start: int, stop: int) -> int:
+        """
+        Count the visited tiles in a column from start up to stop
+        :param x: x index of the column
+        :param start: First y index
+        :param stop: y index after the last one
+        :return: int
+        """
+        if stop <= start:
+            return 0
+        return (self.columns.get(x, 0) >> start & (1 << stop - start) - 1).bit_count()
+
+    def footprint(self) -> int:
+        """
+        Estimate the amount of bytes the map uses
+        :return: int
+        """
+        size = sys.getsizeof(self.rows) + sys.getsizeof(self.columns)
+        size += sum(sys.getsizeof(y) + sys.getsizeof(row) for y, row in self.rows.items())
+        size += sum(sys.getsizeof(x) + sys.getsizeof(column) for x, column in self.columns.items())
+        return size
@@ -0,0 +1,237 @@
+from chunks import ChunkedGrid
+from neighbours import Stencil, FOUR
+from tile import Tile
+
+# Entity kinds, every entity class has one of these as its kind attribute
+PLAYER, ENEMY, FOOD, WEAPON = range(4)
+KINDS = 4
+
+
+class World:
+    """
+    The grid of the game, backed by NumPy arrays instead of a Python object per tile.
+    For every kind of entity it keeps a layer with the amount of entities per tile, and a layer with the id of one of
+    them, so presence checks are O(1). The layers are stored in chunks that are only allocated once something is placed
+    in them, and Tile objects are only created for tiles that are looked at, so the world can be millions of tiles.
+    """
+
+    def __init__(self, width: int, height: int, tile_size: int, color=(255, 255, 255)) -> None:
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.color = color
+
+        self.counts = ChunkedGrid(width, height, layers=KINDS)  # Amount of entities per kind per tile
+        self.ids = ChunkedGrid(width, height, layers=KINDS, fill=-1)  # Id of an entity per kind per tile, -1 if none
+
+        self.entities = {}  # Entity id -> entity
+        self.registry = [{} for _ in range(KINDS)]  # Entity id -> entity, per kind
+        self.positions = {}  # Entity id -> (x, y) index of its tile
+        self.cells = {}  # (x, y) -> list of entity ids, only for tiles that hold entities
+        self.tiles = {}  # (x, y) -> Tile, only for tiles that have been looked at
+        self.stencils = {}  # Offsets -> Stencil with the neighbouring tiles for that neighbourhood
+        self.repainted = set()  # (x, y) of tiles whose color changed since the viewer last drew them
+        self.recorder = None  # EventLog that gets every spawn, move and removal
+        self.next_id = 0
+
+    def __len__(self) -> int:
+        return self.width
+
+    def __getitem__(self, x: int):
+        """
+        Get a column of the grid, so the world can be indexed like the old list of lists: world[x][y]
+        :param x: x index, negative indexes count from the right
+        :return: Column of the grid
+        """
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError('world index out of range')
+        return Column(world=self, x=x)
+
+    def tile(self, x: int, y: int) -> Tile:
+        """
+        Get the tile on an index, creating it the first time it's looked at
+        :param x: x index
+        :param y: y index
+        :return: Tile
+        """
+        tile = self.tiles.get((x, y))
+        if tile is None:
+            tile = Tile(x=x * self.tile_size + self.tile_size // 2, y=y * self.tile_size + self.tile_size // 2,
+                        size=self.tile_size, color=self.color, world=self)
+            self.tiles[(x, y)] = tile
+        return tile
+
+    def stencil(self, offsets=FOUR) -> Stencil:
+        """
+        Get the stencil of a neighbourhood, it's made the first time it's asked for
+        :param offsets: Offsets (dx, dy) of the neighbours, like FOUR, EIGHT or radius(k) from neighbours.py
+        :return: Stencil that gives tuples of Tiles
+        """
+        stencil = self.stencils.get(offsets)
+        if stencil is None:
+            stencil = Stencil(width=self.width, height=self.height, offsets=offsets, tile=self.tile)
+            self.stencils[offsets] = stencil
+        return stencil
+
+    def neighbours(self, x: int, y: int, offsets=FOUR) -> tuple:
+        """
+        Get the tiles around a tile, the tiles past the edge of the world are left out
+        :param x: x index
+        :param y: y index
+        :param offsets: Offsets (dx, dy) of the neighbours
+        :return: Tuple of Tiles in the order of the offsets
+        """
+        return self.stencil(offsets).of(x, y)
+
+    def add(self, entity, x: int, y: int) -> None:
+        """
+        Place an entity on a tile, an entity that is already placed somewhere else is moved
+        :param entity: Player, Enemy, Food or Weapon
+        :param x: x index
+        :param y: y index
+        :return: None
+        """
+        if getattr(entity, 'entity_id', None) is None:
+            entity.entity_id = self.next_id
+            self.next_id += 1
+        entity_id = entity.entity_id
+
+        position = self.positions.get(entity_id)
+        if position == (x, y):
+            return
+        if position is not None:
+            self.move(entity, x, y)
+            return
+
+        self.entities[entity_id] = entity
+        self.registry[entity.kind][entity_id] = entity
+        self.place(entity, x, y)
+        if self.recorder is not None:
+            self.recorder.spawn(entity_id, entity.kind, x, y)
+
+    def move(self, entity, x: int, y: int) -> None:
+        """
+        Move a placed entity to another tile
+        :param entity: Player, Enemy, Food or Weapon
+        :param x: x index of the new tile
+        :param y: y index of the new tile
+        :return: None
+        """
+        self.unplace(entity, *self.positions[entity.entity_id])
+        self.place(entity, x, y)
+        if self.recorder is not None:
+            self.recorder.move(entity.entity_id, entity.kind, x, y)
+
+    def remove(self, entity, x: int, y: int) -> None:
+        """
+        Take an entity off a tile
+        :param entity: Player, Enemy, Food or Weapon
+        :param x: x index
+        :param y: y index
+        :return: None
+        """
+        self.unplace(entity, x, y)
+        del self.entities[entity.entity_id]
+        del self.registry[entity.kind][entity.entity_id]
+        if self.recorder is not None:
+            self.recorder.remove(entity.entity_id, entity.kind, x, y)
+
+    def place(self, entity, x: int, y: int) -> None:
+        entity_id = entity.entity_id
+        self.positions[entity_id] = (x, y)
+        self.cells.setdefault((x, y), []).append(entity_id)
+        self.counts[entity.kind, x, y] += 1
+        self.ids[entity.kind, x, y] = entity_id
+
+    def unplace(self, entity, x: int, y: int) -> None:
+        entity_id = entity.entity_id
+        cell = self.cells[(x, y)]
+        cell.remove(entity_id)
+        if not cell:
+            del self.cells[(x, y)]
+
+        del self.positions[entity_id]
+        self.counts[entity.kind, x, y] -= 1
+        if self.ids[entity.kind, x, y] == entity_id:  # Point the id layer at another entity of this kind, if any
+            others = [other for other in cell if self.entities[other].kind == entity.kind]
+            self.ids[entity.kind, x, y] = others[-1] if others else -1
+
+    def objects(self, x: int, y: int) -> tuple:
+        """
+        Get the entities on a tile
+        :param x: x index
+        :param y: y index
+        :return: Tuple of entities
+        """
+        return tuple(self.entities[entity_id] for entity_id in self.cells.get((x, y), ()))
+
+    def count(self, kind: int, x: int, y: int) -> int:
+        """
+        Get the amount of entities of a kind on a tile
+        :param kind: PLAYER, ENEMY, FOOD or WEAPON
+        :param x: x index
+        :param y: y index
+        :return: int
+        """
+        return int(self.counts[kind, x, y])
+
+    def is_empty(self, x: int, y: int) -> bool:
+        """
+        Check if there are no entities on a tile, agents of a Population included
+        :param x: x index
+        :param y: y index
+        :return: boolean
+        """
+        return not self.counts.cell(x, y).any()
+
+    def find_all(self, kind: int, x: int, y: int) -> list:
+        """
+        Get all entities of a kind on a tile
+        :param kind: PLAYER, ENEMY, FOOD or WEAPON
+        :param x: x index
+        :param y: y index
+        :return: List of entities
+        """
+        if not self.counts[kind, x, y]:
+            return []
+        entities = (self.entities[entity_id] for entity_id in self.cells[(x, y)])
+        return [entity for entity in entities if entity.kind == kind]
+
+    def entities_of(self, kind: int) -> list:
+        """
+        Get all entities of a kind in the world
+        :param kind: PLAYER, ENEMY, FOOD or WEAPON
+        :return: List of entities in the order they were placed
+        """
+        return list(self.registry[kind].values())
+
+    def find(self, kind: int, x: int, y: int):
+        """
+        Get an entity of a kind on a tile
+        :param kind: PLAYER, ENEMY, FOOD or WEAPON
+        :param x: x index
+        :param y: y index
+        :return: The entity, None if there is none
+        """
+        entity_id = self.ids[kind, x, y]
+        return self.entities[int(entity_id)] if entity_id >= 0 else None
+
+
+class Column:
+    """One column of the world, only used to index the world as world[x][y]"""
+
+    def __init__(self, world: World, x: int) -> None:
+        self.world = world
+        self.x = x
+
+    def __len__(self) -> int:
+        return self.world.height
+
+    def __getitem__(self, y: int) -> Tile:
+        if y < 0:
+            y += self.world.height
+        if not 0 <= y < self.world.height:
+            raise IndexError('world index out of range')
+        return self.world.tile(self.x, y)